@@ -0,0 +1,260 @@
+from datetime import date, datetime, timedelta
+
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtWidgets import (
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QLineEdit,
+    QListWidget, QListWidgetItem, QRadioButton, QSpinBox, QPushButton
+)
+
+from pickers import RecordPicker, student_label
+
+# Queued scans are committed together once BATCH_SIZE pile up, or FLUSH_MS after
+# the first one, whichever comes first.
+BATCH_SIZE = 10
+FLUSH_MS = 1000
+LOG_LIMIT = 500
+FLASH_MS = 600
+
+QUEUED_COLOR = QColor("#666666")
+DONE_COLOR = QColor("#1b7f3b")
+FAILED_COLOR = QColor("#c62828")
+
+
+class ScanSessionDialog(QDialog):
+    """Continuous check-out / check-in desk for a barcode scanner.
+
+    Scanned books are queued and committed in small batches through DatabaseManager.circulate.
+    """
+    committed = pyqtSignal()
+
+    def __init__(self, dbm, mode="issue", service=None, parent=None):
+        super().__init__(parent)
+        self.dbm = dbm
+        self.queue = []
+        self.counts = {"issued": 0, "returned": 0, "failed": 0}
+        self.setWindowTitle("Scan Session")
+        self.resize(560, 520)
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        mode_layout = QHBoxLayout()
+        self.issue_radio = QRadioButton("Check out")
+        self.return_radio = QRadioButton("Check in")
+        mode_layout.addWidget(self.issue_radio)
+        mode_layout.addWidget(self.return_radio)
+        mode_layout.addStretch()
+        layout.addLayout(mode_layout)
+
+        form = QFormLayout()
+        self.student_picker = RecordPicker(
+            dbm.pick_students, dbm.get_student, lambda s: s["student_id"], student_label,
+            placeholder="Type a name, class or student ID...", service=service)
+        self.loan_days = QSpinBox()
+        self.loan_days.setRange(1, 365)
+        self.loan_days.setValue(7)
+        self.scan_input = QLineEdit()
+        self.scan_input.setPlaceholderText("Scan a student ID card, then books")
+        self.scan_input.setFont(QFont('Arial', 15))
+        form.addRow("Student:", self.student_picker)
+        form.addRow("Loan days:", self.loan_days)
+        form.addRow("Barcode:", self.scan_input)
+        layout.addLayout(form)
+
+        self.status_label = QLabel("Ready")
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.status_label.setFont(QFont('Arial', 15))
+        self.status_label.setMinimumHeight(40)
+        layout.addWidget(self.status_label)
+        self.counts_label = QLabel()
+        layout.addWidget(self.counts_label)
+        self.log = QListWidget()
+        layout.addWidget(self.log)
+
+        btn_layout = QHBoxLayout()
+        self.commit_btn = QPushButton("Commit now")
+        self.close_btn = QPushButton("Close")
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.commit_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flash_timer = QTimer(self)
+        self.flash_timer.setSingleShot(True)
+        self.flash_timer.setInterval(FLASH_MS)
+        self.flash_timer.timeout.connect(lambda: self.status_label.setStyleSheet(""))
+
+        self.scan_input.returnPressed.connect(self.on_scan)
+        self.student_picker.picked.connect(self.on_student_picked)
+        self.issue_radio.toggled.connect(self.on_mode_changed)
+        self.commit_btn.clicked.connect(self.flush)
+        self.close_btn.clicked.connect(self.accept)
+        self.set_mode(mode)
+        self.update_counts()
+
+    # -------------------------
+    # Mode
+    # -------------------------
+    def set_mode(self, mode):
+        radio = self.issue_radio if mode == "issue" else self.return_radio
+        if radio.isChecked():
+            self.on_mode_changed()
+        else:
+            radio.setChecked(True)
+
+    def mode(self):
+        return "issue" if self.issue_radio.isChecked() else "return"
+
+    def on_mode_changed(self):
+        self.flush()
+        issuing = self.mode() == "issue"
+        self.student_picker.setEnabled(issuing)
+        self.loan_days.setEnabled(issuing)
+        if issuing and self.student_picker.current_id() is None:
+            self.student_picker.setFocus()
+        else:
+            self.scan_input.setFocus()
+
+    def on_student_picked(self, student_id):
+        if student_id is not None:
+            self.flush()  # commit the previous student's books first
+            self.scan_input.setFocus()
+
+    # -------------------------
+    # Scanning
+    # -------------------------
+    def on_scan(self):
+        barcode = self.scan_input.text().strip()
+        self.scan_input.clear()
+        if not barcode:
+            return
+        book = self.dbm.get_book_by_barcode(barcode)
+        if book is None:
+            student = self.dbm.get_student_by_barcode(barcode)
+            if student is None:
+                self.reject_scan(f"No book or student card found with barcode: {barcode}")
+            elif self.mode() != "issue":
+                self.reject_scan("Student cards are only used when checking out.")
+            else:
+                self.student_picker.set_row(student)
+                self.add_log(f"Student: {student_label(student)}", DONE_COLOR)
+                self.flash("Student", student_label(student), DONE_COLOR)
+        elif self.mode() == "issue":
+            self.queue_issue(book)
+        else:
+            self.queue_return(book)
+
+    def queue_issue(self, book):
+        student_id = self.student_picker.current_id()
+        if student_id is None:
+            self.reject_scan("Choose the student before scanning books.")
+            return
+        queued = sum(1 for e in self.queue if e["kind"] == "issue" and e["book_id"] == book["book_id"])
+        if book["quantity"] - queued <= 0:
+            self.reject_scan(f"No copies of '{book['title']}' available to issue.")
+            return
+        self.enqueue({"kind": "issue", "book_id": book["book_id"], "student_id": student_id,
+                      "text": f"'{book['title']}' to {self.student_picker.text()}"})
+
+    def queue_return(self, book):
+        queued = {e["issue_id"] for e in self.queue if e["kind"] == "return"}
+        loans = [r for r in self.dbm.get_open_issues_for_book(book["book_id"]) if r["issue_id"] not in queued]
+        if not loans:
+            self.reject_scan(f"'{book['title']}' is not currently issued.")
+            return
+        loan = loans[0]
+        late = f" ({loan['overdue_days']} days late)" if loan["overdue_days"] else ""
+        self.enqueue({"kind": "return", "issue_id": loan["issue_id"],
+                      "text": f"'{book['title']}' from {loan['student_name']}{late}"})
+
+    def enqueue(self, entry):
+        entry["time"] = datetime.now().strftime("%H:%M:%S")
+        entry["item"] = self.add_log(f"Queued: {entry['text']}", QUEUED_COLOR)
+        self.queue.append(entry)
+        self.flash("Issue" if entry["kind"] == "issue" else "Return", entry["text"], DONE_COLOR)
+        if len(self.queue) >= BATCH_SIZE:
+            self.flush()
+        elif not self.flush_timer.isActive():
+            self.flush_timer.start()
+        self.update_counts()
+
+    def reject_scan(self, message):
+        self.counts["failed"] += 1
+        self.add_log(message, FAILED_COLOR)
+        self.flash("Error", message, FAILED_COLOR)
+        QApplication.beep()
+        self.update_counts()
+
+    # -------------------------
+    # Committing
+    # -------------------------
+    def flush(self):
+        """Commit every queued scan in one transaction and log the outcomes."""
+        self.flush_timer.stop()
+        if not self.queue:
+            return
+        batch, self.queue = self.queue, []
+        issues = [(e["student_id"], e["book_id"]) for e in batch if e["kind"] == "issue"]
+        returns = [e["issue_id"] for e in batch if e["kind"] == "return"]
+        today = date.today()
+        expected = today + timedelta(days=self.loan_days.value())
+        try:
+            issue_results, _, return_errors = self.dbm.circulate(
+                issues, returns, today.strftime("%Y-%m-%d"), expected.strftime("%Y-%m-%d"))
+        except Exception as e:
+            for entry in batch:
+                self.finish(entry, f"Not saved ({e}): {entry['text']}")
+            self.flash("Error", str(e), FAILED_COLOR)
+            QApplication.beep()
+        else:
+            results = iter(issue_results)
+            for entry in batch:
+                if entry["kind"] == "issue":
+                    result = next(results)
+                    if isinstance(result, str):
+                        self.finish(entry, f"{result} {entry['text']}")
+                    else:
+                        self.finish(entry, f"Issued {entry['text']}", "issued")
+                else:
+                    error = return_errors.get(entry["issue_id"])
+                    if error:
+                        self.finish(entry, f"{error} {entry['text']}")
+                    else:
+                        self.finish(entry, f"Returned {entry['text']}", "returned")
+            self.committed.emit()
+        self.update_counts()
+
+    def finish(self, entry, message, counter="failed"):
+        """Replace a queued log line with its outcome; counter is "failed" for errors."""
+        entry["item"].setText(f"{entry['time']}  {message}")
+        entry["item"].setForeground(FAILED_COLOR if counter == "failed" else DONE_COLOR)
+        self.counts[counter] += 1
+
+    # -------------------------
+    # Feedback
+    # -------------------------
+    def add_log(self, text, color):
+        item = QListWidgetItem(f"{datetime.now():%H:%M:%S}  {text}")
+        item.setForeground(color)
+        self.log.insertItem(0, item)
+        while self.log.count() > LOG_LIMIT:
+            self.log.takeItem(self.log.count() - 1)
+        return item
+
+    def flash(self, title, text, color):
+        self.status_label.setText(f"{title}: {text}")
+        self.status_label.setStyleSheet(f"background-color: {color.name()}; color: white;")
+        self.flash_timer.start()
+
+    def update_counts(self):
+        self.counts_label.setText(
+            f"Issued: {self.counts['issued']}   Returned: {self.counts['returned']}   "
+            f"Errors: {self.counts['failed']}   Waiting: {len(self.queue)}")
+
+    def done(self, result):
+        self.flush()
+        super().done(result)
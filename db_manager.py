@@ -1,22 +1,505 @@
 import sqlite3
 import csv
 import os,sys
+import re
+import tempfile
+import threading
+import weakref
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date, datetime
+from query_trace import QueryTracer, TracingCursor, SLOW_QUERY_LOG
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and PyInstaller."""
     if hasattr(sys, "_MEIPASS"):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath("."), relative_path)
-DB_FILE = resource_path("library.db")
+# The live database sits next to the app, not in the read-only PyInstaller bundle.
+DB_FILE = os.path.join(os.path.abspath("."), "library.db")
+BUSY_TIMEOUT = 10  # seconds a connection waits on another writer before failing
+EXPORT_TABLES = ["books", "students", "issued_books", "fines", "settings"]
+# Tables mirrored to Google Sheets; their row changes are recorded in `changes`.
+SYNC_TABLES = ["books", "students", "issued_books", "users"]
+EXPORT_CHUNK = 5000
+PAGE_SIZE = 200
+# The daily overdue fee, read inside a query so fees match the rows returned.
+FEE_RATE_SQL = "SELECT IFNULL((SELECT CAST(value AS REAL) FROM settings WHERE key='overdue_fee'), 0)"
+
+
+def _add_column_if_missing(c, table, column, decl):
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+    return False
+
+
+def _migrate_legacy_book_columns(c):
+    # SQLite cannot ADD a UNIQUE column, so uniqueness comes from an index instead.
+    if _add_column_if_missing(c, "books", "barcode", "TEXT"):
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_books_barcode ON books(barcode)")
+    _add_column_if_missing(c, "books", "added_date", "TEXT")
+
+
+def _migrate_student_card_barcode(c):
+    _add_column_if_missing(c, "students", "card_barcode", "TEXT")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_students_card_barcode ON students(card_barcode)")
+
+
+def _change_log_steps(tables):
+    """Triggers logging every insert, update and delete of tables into `changes`.
+
+    Rows are identified by rowid. Nothing is logged for a table until a sync has
+    started tracking it (it has a sync_state row).
+    """
+    steps = []
+    for table in tables:
+        for event, op, ref in (("INSERT", "I", "new"), ("UPDATE", "U", "new"), ("DELETE", "D", "old")):
+            steps.append(f"""CREATE TRIGGER IF NOT EXISTS changes_{table}_{op.lower()} AFTER {event} ON {table}
+                WHEN EXISTS (SELECT 1 FROM sync_state WHERE tbl='{table}') BEGIN
+                INSERT INTO changes (tbl, row_id, op) VALUES ('{table}', {ref}.rowid, '{op}');
+            END""")
+    return steps
+
+
+def _rollup_steps(table, period_len):
+    """Create a circulation rollup keyed on the first period_len chars of a date and fill it from history."""
+    return [
+        f"""CREATE TABLE IF NOT EXISTS {table} (
+            period TEXT NOT NULL,
+            category TEXT NOT NULL DEFAULT '',
+            issues INTEGER NOT NULL DEFAULT 0,
+            returns INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, category)
+        ) WITHOUT ROWID""",
+        f"DELETE FROM {table}",
+        f"""INSERT INTO {table} (period, category, issues, returns)
+            SELECT period, category, SUM(issues), SUM(returns) FROM (
+                SELECT substr(ib.issue_date, 1, {period_len}) AS period, IFNULL(b.category, '') AS category,
+                       1 AS issues, 0 AS returns
+                FROM issued_books ib LEFT JOIN books b ON ib.book_id=b.book_id
+                WHERE ib.issue_date IS NOT NULL
+                UNION ALL
+                SELECT substr(ib.actual_return_date, 1, {period_len}), IFNULL(b.category, ''), 0, 1
+                FROM issued_books ib LEFT JOIN books b ON ib.book_id=b.book_id
+                WHERE ib.status='Returned' AND ib.actual_return_date IS NOT NULL)
+            GROUP BY period, category""",
+    ]
+
+
+# Dashboard counters kept in the single stats row by triggers, with the query that
+# recomputes each one from scratch.
+STATS_COUNTERS = {
+    "total_books": "SELECT IFNULL(SUM(quantity), 0) FROM books",
+    "total_students": "SELECT COUNT(*) FROM students",
+    "issued_books": "SELECT COUNT(*) FROM issued_books WHERE status='Issued'",
+}
+
+
+# Ordered schema migrations as (version, description, steps). A step is either a
+# SQL string or a callable taking a cursor. Every step must be idempotent so that
+# databases created by older builds can be brought forward safely.
+MIGRATIONS = [
+    (1, "Legacy books columns (barcode, added_date)", [
+        _migrate_legacy_book_columns,
+    ]),
+    (2, "Circulation indexes on issued_books", [
+        "CREATE INDEX IF NOT EXISTS idx_issued_status_due ON issued_books(status, expected_return_date)",
+        "CREATE INDEX IF NOT EXISTS idx_issued_book_status ON issued_books(book_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_issued_student_status ON issued_books(student_id, status)",
+    ]),
+    (3, "Catalog indexes on books", [
+        "CREATE INDEX IF NOT EXISTS idx_books_added_date ON books(added_date)",
+        "CREATE INDEX IF NOT EXISTS idx_books_title ON books(title)",
+    ]),
+    (4, "FTS5 search index for books and students", [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            title, author, category, barcode,
+            content='books', content_rowid='book_id', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts(rowid, title, author, category, barcode)
+            VALUES (new.book_id, new.title, new.author, new.category, new.barcode);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author, category, barcode)
+            VALUES ('delete', old.book_id, old.title, old.author, old.category, old.barcode);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, category, barcode ON books BEGIN
+            INSERT INTO books_fts(books_fts, rowid, title, author, category, barcode)
+            VALUES ('delete', old.book_id, old.title, old.author, old.category, old.barcode);
+            INSERT INTO books_fts(rowid, title, author, category, barcode)
+            VALUES (new.book_id, new.title, new.author, new.category, new.barcode);
+        END""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            name, class, contact,
+            content='students', content_rowid='student_id', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, name, class, contact)
+            VALUES (new.student_id, new.name, new.class, new.contact);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, class, contact)
+            VALUES ('delete', old.student_id, old.name, old.class, old.contact);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF name, class, contact ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, name, class, contact)
+            VALUES ('delete', old.student_id, old.name, old.class, old.contact);
+            INSERT INTO students_fts(rowid, name, class, contact)
+            VALUES (new.student_id, new.name, new.class, new.contact);
+        END""",
+        "INSERT INTO books_fts(books_fts) VALUES ('rebuild')",
+        "INSERT INTO students_fts(students_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Sort-key indexes for keyset pagination", [
+        "CREATE INDEX IF NOT EXISTS idx_students_name ON students(name)",
+        "CREATE INDEX IF NOT EXISTS idx_issued_issue_date ON issued_books(issue_date)",
+        "CREATE INDEX IF NOT EXISTS idx_issued_status_issue_date ON issued_books(status, issue_date)",
+    ]),
+    (6, "Fines ledger with backfill of past late returns", [
+        """CREATE TABLE IF NOT EXISTS fines (
+            fine_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            issue_id INTEGER UNIQUE,
+            student_id INTEGER,
+            days_late INTEGER,
+            rate REAL,
+            amount REAL,
+            assessed_on TEXT,
+            FOREIGN KEY(issue_id) REFERENCES issued_books(issue_id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_fines_assessed_on ON fines(assessed_on, amount)",
+        # History before the ledger existed only knows today's rate.
+        """INSERT OR IGNORE INTO fines (issue_id, student_id, days_late, rate, amount, assessed_on)
+           SELECT issue_id, student_id, days, rate, days * rate, actual_return_date
+           FROM (SELECT issue_id, student_id, actual_return_date,
+                        CAST(julianday(actual_return_date) - julianday(expected_return_date) AS INTEGER) AS days,
+                        IFNULL((SELECT CAST(value AS REAL) FROM settings WHERE key='overdue_fee'), 0) AS rate
+                 FROM issued_books
+                 WHERE status='Returned' AND actual_return_date IS NOT NULL)
+           WHERE days > 0""",
+    ]),
+    (7, "Daily and monthly circulation rollups", _rollup_steps("circulation_daily", 10)
+        + _rollup_steps("circulation_monthly", 7)),
+    (8, "Trigger-maintained dashboard counters", [
+        """CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_books INTEGER NOT NULL DEFAULT 0,
+            total_students INTEGER NOT NULL DEFAULT 0,
+            issued_books INTEGER NOT NULL DEFAULT 0
+        )""",
+        "INSERT OR IGNORE INTO stats (id) VALUES (1)",
+        """CREATE TRIGGER IF NOT EXISTS stats_books_ai AFTER INSERT ON books BEGIN
+            UPDATE stats SET total_books = total_books + IFNULL(new.quantity, 0) WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_books_ad AFTER DELETE ON books BEGIN
+            UPDATE stats SET total_books = total_books - IFNULL(old.quantity, 0) WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_books_au AFTER UPDATE OF quantity ON books BEGIN
+            UPDATE stats SET total_books = total_books + IFNULL(new.quantity, 0) - IFNULL(old.quantity, 0)
+            WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_students_ai AFTER INSERT ON students BEGIN
+            UPDATE stats SET total_students = total_students + 1 WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_students_ad AFTER DELETE ON students BEGIN
+            UPDATE stats SET total_students = total_students - 1 WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_issued_ai AFTER INSERT ON issued_books
+           WHEN new.status='Issued' BEGIN
+            UPDATE stats SET issued_books = issued_books + 1 WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_issued_ad AFTER DELETE ON issued_books
+           WHEN old.status='Issued' BEGIN
+            UPDATE stats SET issued_books = issued_books - 1 WHERE id=1;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS stats_issued_au AFTER UPDATE OF status ON issued_books BEGIN
+            UPDATE stats SET issued_books = issued_books + (new.status IS 'Issued') - (old.status IS 'Issued')
+            WHERE id=1;
+        END""",
+        "UPDATE stats SET " + ", ".join(f"{k} = ({q})" for k, q in STATS_COUNTERS.items()) + " WHERE id=1",
+    ]),
+    (9, "Student ID-card barcodes", [
+        _migrate_student_card_barcode,
+    ]),
+    (10, "Change log for incremental Sheets sync", [
+        """CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_changes_tbl_seq ON changes(tbl, seq)",
+        # Per synced table: which spreadsheet holds it, with which header, and the
+        # last change sequence it includes.
+        """CREATE TABLE IF NOT EXISTS sync_state (
+            tbl TEXT PRIMARY KEY,
+            target TEXT,
+            columns TEXT,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            last_seq INTEGER NOT NULL DEFAULT 0
+        )""",
+        # Sheet row (1-based, header on row 1) currently holding each synced row.
+        """CREATE TABLE IF NOT EXISTS sync_rows (
+            tbl TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            sheet_row INTEGER NOT NULL,
+            PRIMARY KEY (tbl, row_id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_sync_rows_sheet_row ON sync_rows(tbl, sheet_row)",
+    ] + _change_log_steps(SYNC_TABLES)),
+    # Nothing reads per-day circulation; the monthly rollup covers every report.
+    (11, "Drop unused daily circulation rollup", [
+        "DROP TABLE IF EXISTS circulation_daily",
+    ]),
+]
+
+
+def _chunks(ids, size=500):
+    """Split ids into pieces that stay under SQLite's bound-parameter limit."""
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield chunk, ",".join("?" * len(chunk))
+
+
+def _keyset(sql, params, order, after, limit, descending=False):
+    """Finish a keyset-paginated query.
+
+    order is a list of (sql_expr, row_key) pairs forming a unique sort key; after
+    is the last row of the previous page (or None for the first page).
+    """
+    exprs = ", ".join(expr for expr, _ in order)
+    if after is not None:
+        op = "<" if descending else ">"
+        sql += f" AND ({exprs}) {op} ({','.join('?' * len(order))})"
+        params = params + [after[key] for _, key in order]
+    direction = " DESC" if descending else ""
+    sql += " ORDER BY " + ", ".join(expr + direction for expr, _ in order) + " LIMIT ?"
+    return sql, params + [limit]
+
+
+def _record_circulation(c, day, book_counts, column):
+    """Add per-book issue or return counts for one date to the monthly rollup."""
+    c.executemany(f"""INSERT INTO circulation_monthly (period, category, {column})
+                      SELECT ?, IFNULL((SELECT category FROM books WHERE book_id=?), ''), ? WHERE 1
+                      ON CONFLICT(period, category) DO UPDATE SET {column} = {column} + excluded.{column}""",
+                  [(day[:7], bid, n) for bid, n in book_counts.items()])
+
+
+def _issue_books(c, student_id, book_ids, issue_date, expected_return_date):
+    """Issue book_ids to one student inside the caller's transaction.
+
+    Returns one entry per book id, in order: the new issue_id, or an error message.
+    """
+    stock = {}
+    for chunk, marks in _chunks(list(dict.fromkeys(book_ids))):
+        c.execute(f"SELECT book_id, quantity FROM books WHERE book_id IN ({marks})", chunk)
+        stock.update((r["book_id"], r["quantity"]) for r in c.fetchall())
+    taken = Counter()
+    results = []
+    for bid in book_ids:
+        if bid not in stock:
+            results.append("Book not found.")
+        elif stock[bid] - taken[bid] <= 0:
+            results.append("No copies available to issue.")
+        else:
+            c.execute("""INSERT INTO issued_books (book_id,student_id,issue_date,expected_return_date,status)
+                         VALUES (?,?,?,?,?)""",
+                      (bid, student_id, issue_date, expected_return_date, "Issued"))
+            results.append(c.lastrowid)
+            taken[bid] += 1
+    c.executemany("UPDATE books SET quantity = quantity - ? WHERE book_id=?",
+                  [(n, bid) for bid, n in taken.items()])
+    _record_circulation(c, issue_date, taken, "issues")
+    return results
+
+
+def _return_books(c, issue_ids, actual_return_date):
+    """Return loans inside the caller's transaction; see DatabaseManager.return_books."""
+    issue_ids = list(dict.fromkeys(issue_ids))
+    errors = {}
+    found = {}
+    for chunk, marks in _chunks(issue_ids):
+        c.execute(f"SELECT issue_id, book_id, status FROM issued_books WHERE issue_id IN ({marks})", chunk)
+        found.update((r["issue_id"], r) for r in c.fetchall())
+    returned = []
+    for iid in issue_ids:
+        rec = found.get(iid)
+        if not rec:
+            errors[iid] = "Issue record not found."
+        elif rec["status"] != "Issued":
+            errors[iid] = "Book already returned."
+        else:
+            returned.append(rec)
+    c.executemany("UPDATE issued_books SET actual_return_date=?, status=? WHERE issue_id=?",
+                  [(actual_return_date, "Returned", r["issue_id"]) for r in returned])
+    returned_per_book = Counter(r["book_id"] for r in returned)
+    c.executemany("UPDATE books SET quantity = quantity + ? WHERE book_id=?",
+                  [(n, bid) for bid, n in returned_per_book.items()])
+    _record_circulation(c, actual_return_date, returned_per_book, "returns")
+    c.execute("SELECT value FROM settings WHERE key='overdue_fee'")
+    rate = c.fetchone()
+    rate = float(rate[0]) if rate else 0.0
+    c.executemany("""INSERT OR IGNORE INTO fines (issue_id, student_id, days_late, rate, amount, assessed_on)
+                     SELECT issue_id, student_id, days, ?, days * ?, actual_return_date
+                     FROM (SELECT issue_id, student_id, actual_return_date,
+                                  CAST(julianday(actual_return_date) - julianday(expected_return_date)
+                                       AS INTEGER) AS days
+                           FROM issued_books WHERE issue_id=?)
+                     WHERE days > 0""",
+                  [(rate, rate, r["issue_id"]) for r in returned])
+    return [r["issue_id"] for r in returned], errors
+
+
+def _today(as_of_date=None):
+    return (as_of_date or date.today()).strftime("%Y-%m-%d")
+
+
+def fts_query(search):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    terms = re.findall(r"\w+", search or "")
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+class _Connection(sqlite3.Connection):
+    """Connection that hands out TracingCursors while query tracing is enabled."""
+    tracer = None
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TracingCursor if self.tracer else sqlite3.Cursor
+        return super().cursor(factory)
+
+
+class _ReadConnection(_Connection):
+    """Read-only pooled connection (subclassed so the pool can hold weak references)."""
+
 
 class DatabaseManager:
     def __init__(self, db_path=DB_FILE):
         self.db_path = db_path
-        self.conn = sqlite3.connect("library.db", check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
+        self.tracer = None
+        # One writer connection; every other thread reads through its own connection.
+        self.conn = self._connect()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._local = threading.local()
+        self._readers = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.RLock()
         self._init_db()
-        self.create_settings_table() 
+        self.create_settings_table()
+        self._migrate()
+
+    def _connect(self, factory=_Connection):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False, factory=factory)
+        conn.row_factory = sqlite3.Row
+        conn.tracer = self.tracer
+        return conn
+
+    def enable_query_tracing(self, slow_ms=100, log_path=SLOW_QUERY_LOG):
+        """Time every statement on every connection; statements over slow_ms go to log_path."""
+        self.disable_query_tracing()
+        self._set_tracer(QueryTracer(slow_ms, log_path))
+        return self.tracer
+
+    def disable_query_tracing(self):
+        if self.tracer:
+            tracer = self.tracer
+            self._set_tracer(None)
+            tracer.close()
+
+    def dump_query_stats(self):
+        """Per-statement call counts and latency histograms, also appended to the slow-query log."""
+        if not self.tracer:
+            return "Query tracing is not enabled."
+        return self.tracer.dump()
+
+    def _set_tracer(self, tracer):
+        self.tracer = tracer
+        self.conn.tracer = tracer
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.tracer = tracer
+
+    def reader_connection(self):
+        """The calling thread's read-only connection, opened on first use.
+
+        In WAL mode these readers never block, and are never blocked by, the writer
+        connection. A thread's connection is closed when the thread goes away.
+        """
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            conn = self._connect(_ReadConnection)
+            conn.execute("PRAGMA query_only=1")
+            self._local.reader = conn
+            with self._readers_lock:
+                self._readers.add(conn)
+        return conn
+
+    def read_cursor(self):
+        """Cursor on the calling thread's read connection."""
+        return self.reader_connection().cursor()
+
+    def data_version(self):
+        """Token that changes after any connection or process commits to the database.
+
+        PRAGMA data_version ignores the asking connection's own commits, so it is read
+        on the caller's read-only connection, which sees every write as foreign.
+        """
+        c = self.read_cursor()
+        c.execute("PRAGMA data_version")
+        return c.fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        """Writer cursor inside BEGIN IMMEDIATE; commits on success, rolls back on error."""
+        with self._write_lock:
+            c = self.conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                yield c
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    def _migrate(self):
+        """Apply any pending MIGRATIONS, each in its own transaction."""
+        c = self.conn.cursor()
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_on TEXT
+        )
+        """)
+        self.conn.commit()
+        current = self.get_schema_version()
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                c.execute("BEGIN")
+                for step in steps:
+                    if callable(step):
+                        step(c)
+                    else:
+                        c.execute(step)
+                c.execute("INSERT INTO schema_version (version, description, applied_on) VALUES (?,?,?)",
+                          (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                raise Exception(f"Schema migration {version} ({description}) failed: {e}")
+
+    def get_schema_version(self):
+        c = self.conn.cursor()
+        c.execute("SELECT IFNULL(MAX(version), 0) FROM schema_version")
+        return c.fetchone()[0]
 
     def _init_db(self):
         c = self.conn.cursor()
@@ -59,14 +542,6 @@ class DatabaseManager:
             password TEXT
         )
         """)
-        c.execute("PRAGMA table_info(books)")
-        existing_cols = [row[1] for row in c.fetchall()]
-        if "barcode" not in existing_cols:
-            c.execute("ALTER TABLE books ADD COLUMN barcode TEXT UNIQUE")
-            self.conn.commit()
-        if "added_date" not in existing_cols:
-            c.execute("ALTER TABLE books ADD COLUMN added_date TEXT")
-            self.conn.commit()
         c.execute("""
             CREATE TABLE IF NOT EXISTS students (
                 student_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -85,7 +560,7 @@ class DatabaseManager:
 
 
     def validate_user(self, username, password):
-        c = self.conn.cursor()
+        c = self.read_cursor()
         c.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
         return c.fetchone() is not None
 
@@ -106,123 +581,291 @@ class DatabaseManager:
         self.conn.commit()
 
     def delete_book(self, book_id):
-        c = self.conn.cursor()
-        c.execute("SELECT COUNT(*) FROM issued_books WHERE book_id=? AND status='Issued'", (book_id,))
-        if c.fetchone()[0] > 0:
-            raise Exception("Cannot delete: book currently issued to a student.")
-        c.execute("DELETE FROM books WHERE book_id=?", (book_id,))
-        self.conn.commit()
+        _, errors = self.delete_books([book_id])
+        if errors:
+            raise Exception(errors[book_id])
 
-    def list_books(self, search=None):
-        c = self.conn.cursor()
-        if search:
-            s = f"%{search}%"
-            c.execute("SELECT * FROM books WHERE title LIKE ? OR author LIKE ? OR category LIKE ? ORDER BY title",
-                      (s, s, s))
+    def delete_books(self, book_ids):
+        """Delete several books in one transaction.
+
+        Returns (deleted_ids, errors) where errors maps book_id -> message for
+        books that were skipped because copies are still issued.
+        """
+        book_ids = list(dict.fromkeys(book_ids))
+        errors = {}
+        with self.transaction() as c:
+            for chunk, marks in _chunks(book_ids):
+                c.execute(f"""SELECT DISTINCT book_id FROM issued_books
+                              WHERE status='Issued' AND book_id IN ({marks})""", chunk)
+                for r in c.fetchall():
+                    errors[r["book_id"]] = "Cannot delete: book currently issued to a student."
+            deleted = [bid for bid in book_ids if bid not in errors]
+            for chunk, marks in _chunks(deleted):
+                c.execute(f"DELETE FROM books WHERE book_id IN ({marks})", chunk)
+        return deleted, errors
+
+    def list_books_page(self, search=None, after=None, limit=PAGE_SIZE):
+        """One keyset page of books, by title (or by relevance when searching).
+
+        Pass the last row of the previous page as after to get the next page.
+        """
+        c = self.read_cursor()
+        if fts_query(search):
+            sql, params = _keyset("""SELECT b.*, f.rank AS rank FROM books_fts f
+                                     JOIN books b ON b.book_id=f.rowid WHERE books_fts MATCH ?""",
+                                  [fts_query(search)], [("f.rank", "rank"), ("b.book_id", "book_id")],
+                                  after, limit)
         else:
-            c.execute("SELECT * FROM books ORDER BY title")
+            sql, params = _keyset("SELECT * FROM books WHERE 1=1", [],
+                                  [("title", "title"), ("book_id", "book_id")], after, limit)
+        c.execute(sql, params)
         return c.fetchall()
 
+    def count_books(self, search=None):
+        c = self.read_cursor()
+        if fts_query(search):
+            c.execute("SELECT COUNT(*) FROM books_fts WHERE books_fts MATCH ?", (fts_query(search),))
+        else:
+            c.execute("SELECT COUNT(*) FROM books")
+        return c.fetchone()[0]
+
     def get_book(self, book_id):
-        c = self.conn.cursor()
+        c = self.read_cursor()
         c.execute("SELECT * FROM books WHERE book_id=?", (book_id,))
         return c.fetchone()
 
+    def _rows_by_ids(self, select, id_column, key, ids, params=()):
+        """Rows whose id_column is in ids, returned in the order of ids (missing ids skipped)."""
+        c = self.read_cursor()
+        found = {}
+        for chunk, marks in _chunks(list(ids)):
+            c.execute(f"{select} WHERE {id_column} IN ({marks})", list(params) + chunk)
+            found.update((r[key], r) for r in c.fetchall())
+        return [found[i] for i in ids if i in found]
+
+    def pick_books(self, search, limit=20, available_only=True):
+        """Best prefix matches for a picker; a number also matches that book_id exactly."""
+        c = self.read_cursor()
+        stock = " AND b.quantity > 0" if available_only else ""
+        rows = []
+        if search and search.strip().isdigit():
+            c.execute("SELECT b.* FROM books b WHERE b.book_id=?" + stock, (int(search),))
+            rows = c.fetchall()
+        if fts_query(search):
+            c.execute(f"""SELECT b.* FROM books_fts f JOIN books b ON b.book_id=f.rowid
+                          WHERE books_fts MATCH ?{stock} ORDER BY f.rank, b.title LIMIT ?""",
+                      (fts_query(search), limit))
+            rows += [r for r in c.fetchall() if r not in rows]
+        return rows[:limit]
 
-    def add_student(self, name, sclass, contact):
+    def get_books_by_ids(self, book_ids):
+        return self._rows_by_ids("SELECT * FROM books", "book_id", "book_id", book_ids)
+
+
+    def add_student(self, name, sclass, contact, card_barcode=None):
         c = self.conn.cursor()
-        c.execute("INSERT INTO students (name,class,contact) VALUES (?,?,?)", (name, sclass, contact))
+        c.execute("INSERT INTO students (name,class,contact,card_barcode) VALUES (?,?,?,?)",
+                  (name, sclass, contact, card_barcode or None))
         self.conn.commit()
         return c.lastrowid
 
-    def update_student(self, student_id, name, sclass, contact):
-        c = self.conn.cursor()
-        c.execute("UPDATE students SET name=?, class=?, contact=? WHERE student_id=?",
-                  (name, sclass, contact, student_id))
-        self.conn.commit()
+    def update_student(self, student_id, name, sclass, contact, card_barcode=None):
+        """Update a student's details and ID-card barcode in one statement; an empty barcode clears it."""
+        with self.transaction() as c:
+            c.execute("UPDATE students SET name=?, class=?, contact=?, card_barcode=? WHERE student_id=?",
+                      (name, sclass, contact, card_barcode or None, student_id))
 
     def delete_student(self, student_id):
-        c = self.conn.cursor()
-        c.execute("SELECT COUNT(*) FROM issued_books WHERE student_id=? AND status='Issued'", (student_id,))
-        if c.fetchone()[0] > 0:
-            raise Exception("Cannot delete: student has issued books.")
-        c.execute("DELETE FROM students WHERE student_id=?", (student_id,))
-        self.conn.commit()
+        _, errors = self.delete_students([student_id])
+        if errors:
+            raise Exception(errors[student_id])
 
-    def list_students(self, search=None):
-        c = self.conn.cursor()
-        if search:
-            s = f"%{search}%"
-            c.execute("SELECT * FROM students WHERE name LIKE ? OR class LIKE ? OR contact LIKE ? ORDER BY name",
-                      (s, s, s))
+    def delete_students(self, student_ids):
+        """Delete several students in one transaction; returns (deleted_ids, errors)."""
+        student_ids = list(dict.fromkeys(student_ids))
+        errors = {}
+        with self.transaction() as c:
+            for chunk, marks in _chunks(student_ids):
+                c.execute(f"""SELECT DISTINCT student_id FROM issued_books
+                              WHERE status='Issued' AND student_id IN ({marks})""", chunk)
+                for r in c.fetchall():
+                    errors[r["student_id"]] = "Cannot delete: student has issued books."
+            deleted = [sid for sid in student_ids if sid not in errors]
+            for chunk, marks in _chunks(deleted):
+                c.execute(f"DELETE FROM students WHERE student_id IN ({marks})", chunk)
+        return deleted, errors
+
+    def list_students_page(self, search=None, after=None, limit=PAGE_SIZE):
+        """One keyset page of students, by name (or by relevance when searching)."""
+        c = self.read_cursor()
+        if fts_query(search):
+            sql, params = _keyset("""SELECT s.*, f.rank AS rank FROM students_fts f
+                                     JOIN students s ON s.student_id=f.rowid WHERE students_fts MATCH ?""",
+                                  [fts_query(search)], [("f.rank", "rank"), ("s.student_id", "student_id")],
+                                  after, limit)
         else:
-            c.execute("SELECT * FROM students ORDER BY name")
+            sql, params = _keyset("SELECT * FROM students WHERE 1=1", [],
+                                  [("name", "name"), ("student_id", "student_id")], after, limit)
+        c.execute(sql, params)
         return c.fetchall()
 
+    def count_students(self, search=None):
+        c = self.read_cursor()
+        if fts_query(search):
+            c.execute("SELECT COUNT(*) FROM students_fts WHERE students_fts MATCH ?", (fts_query(search),))
+        else:
+            c.execute("SELECT COUNT(*) FROM students")
+        return c.fetchone()[0]
+
+    def pick_students(self, search, limit=20):
+        """Best prefix matches for a picker; a number or card barcode also matches exactly."""
+        c = self.read_cursor()
+        rows = []
+        if search and search.strip().isdigit():
+            c.execute("SELECT * FROM students WHERE student_id=?", (int(search),))
+            rows = c.fetchall()
+        card = self.get_student_by_barcode(search.strip()) if search and search.strip() else None
+        if card is not None and card not in rows:
+            rows.append(card)
+        if fts_query(search):
+            c.execute("""SELECT s.* FROM students_fts f JOIN students s ON s.student_id=f.rowid
+                         WHERE students_fts MATCH ? ORDER BY f.rank, s.name LIMIT ?""",
+                      (fts_query(search), limit))
+            rows += [r for r in c.fetchall() if r not in rows]
+        return rows[:limit]
+
+    def get_students_by_ids(self, student_ids):
+        return self._rows_by_ids("SELECT * FROM students", "student_id", "student_id", student_ids)
+
     def get_student(self, student_id):
-        c = self.conn.cursor()
+        c = self.read_cursor()
         c.execute("SELECT * FROM students WHERE student_id=?", (student_id,))
         return c.fetchone()
 
+    def get_student_by_barcode(self, card_barcode):
+        """Fetch a single student by ID-card barcode."""
+        c = self.read_cursor()
+        c.execute("SELECT * FROM students WHERE card_barcode=?", (card_barcode,))
+        return c.fetchone()
+
     def issue_book(self, book_id, student_id, issue_date, expected_return_date):
-        c = self.conn.cursor()
-        c.execute("SELECT quantity FROM books WHERE book_id=?", (book_id,))
-        row = c.fetchone()
-        if not row:
-            raise Exception("Book not found.")
-        if row["quantity"] <= 0:
-            raise Exception("No copies available to issue.")
-        c.execute("""INSERT INTO issued_books (book_id,student_id,issue_date,expected_return_date,status)
-                     VALUES (?,?,?,?,?)""",
-                  (book_id, student_id, issue_date, expected_return_date, "Issued"))
-        c.execute("UPDATE books SET quantity = quantity - 1 WHERE book_id=?", (book_id,))
-        self.conn.commit()
-        return c.lastrowid
+        result = self.issue_books(student_id, [book_id], issue_date, expected_return_date)[0]
+        if isinstance(result, str):
+            raise Exception(result)
+        return result
+
+    def issue_books(self, student_id, book_ids, issue_date, expected_return_date):
+        """Issue several books to one student in one transaction.
+
+        A book id may repeat to issue more than one copy. Returns one entry per book
+        id, in order: the new issue_id, or an error message for a copy not issued.
+        """
+        with self.transaction() as c:
+            return _issue_books(c, student_id, book_ids, issue_date, expected_return_date)
 
     def return_book(self, issue_id, actual_return_date):
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM issued_books WHERE issue_id=?", (issue_id,))
-        rec = c.fetchone()
-        if not rec:
-            raise Exception("Issue record not found.")
-        if rec["status"] != "Issued":
-            raise Exception("Book already returned.")
-        c.execute("UPDATE issued_books SET actual_return_date=?, status=? WHERE issue_id=?",
-                  (actual_return_date, "Returned", issue_id))
-        c.execute("UPDATE books SET quantity = quantity + 1 WHERE book_id=?", (rec["book_id"],))
-        self.conn.commit()
+        _, errors = self.return_books([issue_id], actual_return_date)
+        if errors:
+            raise Exception(errors[issue_id])
 
-    def list_issued(self, only_issued=True, search=None):
-        c = self.conn.cursor()
-        base = """SELECT ib.issue_id, ib.book_id, b.title, b.author, ib.student_id, s.name as student_name,
-                  ib.issue_date, ib.expected_return_date, ib.actual_return_date, ib.status
+    def return_books(self, issue_ids, actual_return_date):
+        """Return several loans in one transaction.
+
+        Late returns are written to the fines ledger at the fee rate in effect now.
+        Returns (returned_ids, errors) where errors maps issue_id -> message for
+        records that are missing or already returned.
+        """
+        with self.transaction() as c:
+            return _return_books(c, issue_ids, actual_return_date)
+
+    def circulate(self, issues, issue_ids, day, expected_return_date):
+        """Apply a batch of scanned checkouts and check-ins in one transaction.
+
+        issues is a list of (student_id, book_id); issue_ids are loans to return.
+        Returns (issue_results, returned_ids, return_errors) where issue_results has
+        one entry per issue, in order: the new issue_id or an error message.
+        """
+        by_student = {}
+        for pos, (sid, _) in enumerate(issues):
+            by_student.setdefault(sid, []).append(pos)
+        issue_results = [None] * len(issues)
+        with self.transaction() as c:
+            returned, errors = _return_books(c, issue_ids, day)
+            for sid, positions in by_student.items():
+                results = _issue_books(c, sid, [issues[p][1] for p in positions], day, expected_return_date)
+                for pos, result in zip(positions, results):
+                    issue_results[pos] = result
+        return issue_results, returned, errors
+
+    # Days late: still-issued loans count up to today (d.today, bound by the single ?
+    # parameter), returned ones up to their return date. Never negative.
+    OVERDUE_DAYS_SQL = """IFNULL(MAX(0, CAST(julianday(CASE WHEN ib.status='Issued' THEN d.today
+                                                      ELSE ib.actual_return_date END)
+                           - julianday(ib.expected_return_date) AS INTEGER)), 0)"""
+    # Fee: open loans accrue at the current rate, returned ones show their fines entry.
+    ISSUED_SELECT = """SELECT ib.issue_id, ib.book_id, b.title, b.author, ib.student_id, s.name as student_name,
+                  ib.issue_date, ib.expected_return_date, ib.actual_return_date, ib.status,
+                  """ + OVERDUE_DAYS_SQL + """ AS overdue_days, f.amount AS fine_amount,
+                  CASE WHEN ib.status='Issued' THEN """ + OVERDUE_DAYS_SQL + """ * (""" + FEE_RATE_SQL + """)
+                       ELSE IFNULL(f.amount, 0) END AS fee
                   FROM issued_books ib
+                  CROSS JOIN (SELECT ? AS today) d
                   LEFT JOIN books b ON ib.book_id=b.book_id
-                  LEFT JOIN students s ON ib.student_id=s.student_id"""
-        conds = []
+                  LEFT JOIN students s ON ib.student_id=s.student_id
+                  LEFT JOIN fines f ON f.issue_id=ib.issue_id"""
+
+    def _issued_filter(self, only_issued, search):
+        conds = ["1=1"]
         params = []
         if only_issued:
             conds.append("ib.status='Issued'")
-        if search:
-            s = f"%{search}%"
-            conds.append("(b.title LIKE ? OR s.name LIKE ?)")
-            params += [s, s]
-        if conds:
-            base += " WHERE " + " AND ".join(conds)
-        base += " ORDER BY ib.issue_date DESC"
-        c.execute(base, params)
+        if fts_query(search):
+            conds.append("""(ib.book_id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)
+                          OR ib.student_id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?))""")
+            params += [fts_query(search), fts_query(search)]
+        return " WHERE " + " AND ".join(conds), params
+
+    def list_issued_page(self, only_issued=True, search=None, after=None, limit=PAGE_SIZE):
+        """One keyset page of loans (with overdue_days), newest issue_date first."""
+        c = self.read_cursor()
+        where, params = self._issued_filter(only_issued, search)
+        sql, params = _keyset(self.ISSUED_SELECT + where, [_today()] + params,
+                              [("ib.issue_date", "issue_date"), ("ib.issue_id", "issue_id")],
+                              after, limit, descending=True)
+        c.execute(sql, params)
         return c.fetchall()
 
-    def list_all_issues(self, search=None):
-        return self.list_issued(only_issued=False, search=search)
+    def count_issued(self, only_issued=True, search=None):
+        c = self.read_cursor()
+        where, params = self._issued_filter(only_issued, search)
+        c.execute("SELECT COUNT(*) FROM issued_books ib" + where, params)
+        return c.fetchone()[0]
+
+    def get_issues_by_ids(self, issue_ids):
+        """Loans in the list_issued row shape, in the order of issue_ids."""
+        return self._rows_by_ids(self.ISSUED_SELECT, "ib.issue_id", "issue_id", issue_ids, [_today()])
+
+    def get_open_issues_for_book(self, book_id):
+        """Loans of book_id that are still out, earliest due first."""
+        c = self.read_cursor()
+        c.execute(self.ISSUED_SELECT + """ WHERE ib.book_id=? AND ib.status='Issued'
+                  ORDER BY ib.expected_return_date, ib.issue_id""", [_today(), book_id])
+        return c.fetchall()
 
     def get_issue(self, issue_id):
-        c = self.conn.cursor()
+        c = self.read_cursor()
         c.execute("SELECT * FROM issued_books WHERE issue_id=?", (issue_id,))
         return c.fetchone()
 
-    def get_overdue_fee(self):
+    def rebuild_search_index(self):
+        """Re-read every book and student into the FTS index."""
         c = self.conn.cursor()
+        c.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+        c.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+        self.conn.commit()
+
+    def get_overdue_fee(self):
+        c = self.read_cursor()
         c.execute("SELECT value FROM settings WHERE key='overdue_fee'")
         result = c.fetchone()
         if result:
@@ -247,21 +890,84 @@ class DatabaseManager:
         )
     """)
         self.conn.commit()
-    def export_table_csv(self, table_name, csv_path):
-        c = self.conn.cursor()
+    def iter_table_chunks(self, table_name, chunk_size=EXPORT_CHUNK):
+        """Yield (columns, rows) chunks of a whole table without loading it into memory."""
+        c = self.read_cursor()
         c.execute(f"SELECT * FROM {table_name}")
-        rows = c.fetchall()
-        if not rows:
+        columns = [col[0] for col in c.description]
+        while True:
+            rows = c.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield columns, rows
+
+    def export_table_csv(self, table_name, csv_path):
+        chunks = self.iter_table_chunks(table_name)
+        first = next(chunks, None)
+        if first is None:
             raise Exception("No data to export.")
-        columns = rows[0].keys()
         with open(csv_path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow(columns)
-            for r in rows:
-                writer.writerow([r[col] for col in columns])
+            writer.writerow(first[0])
+            writer.writerows(first[1])
+            for _, rows in chunks:
+                writer.writerows(rows)
+
+    def export_archive(self, archive_path, tables=EXPORT_TABLES, progress=None, cancelled=None):
+        """Export several tables concurrently into one zip of <table>.csv files.
+
+        Each table is streamed by its own thread and read connection into a temporary
+        CSV, which is then deflated into the archive while the other tables keep
+        reading. progress(done_rows, total_rows) is called from worker threads.
+        Returns {table: row_count}, or None if cancelled (the partial archive is removed).
+        """
+        c = self.read_cursor()
+        totals = {}
+        for table in tables:
+            c.execute(f"SELECT COUNT(*) FROM {table}")
+            totals[table] = c.fetchone()[0]
+        total_rows = sum(totals.values())
+        done = [0]
+        lock = threading.Lock()
+        zip_lock = threading.Lock()
+
+        def export_one(zf, table, tmp_dir):
+            count = 0
+            tmp_path = os.path.join(tmp_dir, f"{table}.csv")
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                header_written = False
+                for columns, rows in self.iter_table_chunks(table):
+                    if cancelled and cancelled():
+                        return None
+                    if not header_written:
+                        writer.writerow(columns)
+                        header_written = True
+                    writer.writerows(rows)
+                    count += len(rows)
+                    with lock:
+                        done[0] += len(rows)
+                        if progress:
+                            progress(done[0], total_rows)
+                if not header_written:
+                    empty = self.read_cursor().execute(f"SELECT * FROM {table} LIMIT 0")
+                    writer.writerow([col[0] for col in empty.description])
+            with zip_lock:
+                zf.write(tmp_path, f"{table}.csv")
+            return count
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                with ThreadPoolExecutor(max_workers=len(tables)) as pool:
+                    futures = {t: pool.submit(export_one, zf, t, tmp_dir) for t in tables}
+                    counts = {t: f.result() for t, f in futures.items()}
+        if cancelled and cancelled():
+            os.remove(archive_path)
+            return None
+        return counts
     def get_book_by_barcode(self, barcode):
         """Fetch a single book record by barcode."""
-        c = self.conn.cursor()
+        c = self.read_cursor()
         c.execute("SELECT * FROM books WHERE barcode=?", (barcode,))
         return c.fetchone()
 
@@ -281,23 +987,104 @@ class DatabaseManager:
 
 
     def get_overdue(self, as_of_date=None):
-        if as_of_date is None:
-            as_of_date = date.today()
-        c = self.conn.cursor()
+        """Overdue loans as (issue_id, book_id, title, student_id, name, issue_date,
+        expected_return_date, overdue_days) rows, most overdue first.
+
+        Only rows matching the indexed expected_return_date < as_of predicate are read.
+        """
+        as_of = _today(as_of_date)
+        c = self.read_cursor()
         c.execute("""SELECT ib.issue_id, ib.book_id, b.title, ib.student_id, s.name,
-                     ib.issue_date, ib.expected_return_date
+                     ib.issue_date, ib.expected_return_date,
+                     CAST(julianday(?) - julianday(ib.expected_return_date) AS INTEGER) AS overdue_days
                      FROM issued_books ib
                      LEFT JOIN books b ON ib.book_id=b.book_id
                      LEFT JOIN students s ON ib.student_id=s.student_id
-                     WHERE ib.status='Issued'""")
-        res = []
-        for row in c.fetchall():
-            expected = datetime.strptime(row["expected_return_date"], "%Y-%m-%d").date()
-            overdue_days = (as_of_date - expected).days
-            if overdue_days > 0:
-                res.append((row["issue_id"], row["book_id"], row["title"], row["student_id"], row["name"],
-                            row["issue_date"], row["expected_return_date"], overdue_days))
-        return res
+                     WHERE ib.status='Issued' AND ib.expected_return_date < ?
+                     ORDER BY ib.expected_return_date, ib.issue_id""", (as_of, as_of))
+        return c.fetchall()
+
+    def count_overdue(self, as_of_date=None):
+        c = self.read_cursor()
+        c.execute("SELECT COUNT(*) FROM issued_books WHERE status='Issued' AND expected_return_date < ?",
+                  (_today(as_of_date),))
+        return c.fetchone()[0]
+
+    def get_fee_income(self, as_of_date=None):
+        """(month_income, year_income) from the fines ledger for the month/year of as_of_date."""
+        as_of = as_of_date or date.today()
+        c = self.read_cursor()
+        c.execute("""SELECT IFNULL(SUM(CASE WHEN assessed_on >= ? THEN amount END), 0),
+                            IFNULL(SUM(amount), 0)
+                     FROM fines WHERE assessed_on >= ? AND assessed_on < ?""",
+                  (as_of.strftime("%Y-%m-01"), as_of.strftime("%Y-01-01"), f"{as_of.year + 1}-01-01"))
+        month_income, year_income = c.fetchone()
+        return month_income, year_income
    
+    def get_top_books(self, limit=20):
+        c = self.read_cursor()
+        c.execute("""SELECT b.book_id, b.title, b.author, COUNT(ib.issue_id) AS times_issued
+                     FROM books b
+                     LEFT JOIN issued_books ib ON b.book_id = ib.book_id
+                     GROUP BY b.book_id
+                     ORDER BY times_issued DESC, b.title
+                     LIMIT ?""", (limit,))
+        return c.fetchall()
+
+    def list_new_arrivals(self, limit=10):
+        c = self.read_cursor()
+        c.execute("SELECT title, author, added_date FROM books ORDER BY added_date DESC LIMIT ?", (limit,))
+        return c.fetchall()
+
+    def get_dashboard_stats(self, as_of_date=None):
+        """Dashboard card values as a dict, read from the stats row plus the indexed overdue count."""
+        c = self.read_cursor()
+        c.execute("SELECT " + ", ".join(STATS_COUNTERS) + " FROM stats WHERE id=1")
+        stats = dict(c.fetchone())
+        stats["overdue_books"] = self.count_overdue(as_of_date)
+        return stats
+
+    def check_stats(self, repair=True):
+        """Recompute every dashboard counter from the base tables.
+
+        Returns {counter: (stored, actual)} for counters that had drifted; with
+        repair the stats row is rewritten with the recomputed values.
+        """
+        with self.transaction() as c:
+            c.execute("SELECT * FROM stats WHERE id=1")
+            stored = c.fetchone()
+            drift = {}
+            for name, query in STATS_COUNTERS.items():
+                c.execute(query)
+                actual = c.fetchone()[0]
+                if stored is None or stored[name] != actual:
+                    drift[name] = (stored[name] if stored else None, actual)
+            if repair and drift:
+                c.execute("INSERT OR IGNORE INTO stats (id) VALUES (1)")
+                c.execute("UPDATE stats SET " + ", ".join(f"{k}=?" for k in drift) + " WHERE id=1",
+                          [actual for _, actual in drift.values()])
+        return drift
+
+    def get_circulation_series(self, year, category=None):
+        """Issues and returns for each month of year as two 12-item lists, from the monthly rollup."""
+        sql = """SELECT CAST(substr(period, 6, 2) AS INTEGER) AS month, SUM(issues), SUM(returns)
+                 FROM circulation_monthly WHERE period >= ? AND period < ?"""
+        params = [f"{year}-01", f"{year + 1}-01"]
+        if category is not None:
+            sql += " AND category=?"
+            params.append(category)
+        c = self.read_cursor()
+        c.execute(sql + " GROUP BY period", params)
+        issues, returns = [0] * 12, [0] * 12
+        for month, n_issues, n_returns in c.fetchall():
+            issues[month - 1] = n_issues
+            returns[month - 1] = n_returns
+        return issues, returns
+
     def close(self):
+        with self._readers_lock:
+            for conn in list(self._readers):
+                conn.close()
         self.conn.close()
+        if self.tracer:
+            self.tracer.close()
@@ -116,18 +116,28 @@ class AddEditStudentDialog(QDialog):
         self.name_input = QLineEdit()
         self.class_input = QLineEdit()
         self.contact_input = QLineEdit()
+        self.card_input = QLineEdit()
         
         if student:
             self.name_input.setText(student['name'])
             self.class_input.setText(student['class'] or '')
             self.contact_input.setText(student['contact'] or '')
+            self.card_input.setText(student['card_barcode'] or '')
         
         form.addRow("Name *:", self.name_input)
         form.addRow("Class:", self.class_input)
         form.addRow("Contact:", self.contact_input)
+        form.addRow("ID Card Barcode:", self.card_input)
         
         layout.addLayout(form)
         
+        scan_layout = QHBoxLayout()
+        self.scan_btn = QPushButton("📠 Scan ID Card")
+        self.scan_btn.clicked.connect(self.scan_card)
+        scan_layout.addWidget(self.scan_btn)
+        scan_layout.addStretch()
+        layout.addLayout(scan_layout)
+        
         btn_layout = QHBoxLayout()
         self.save_btn = QPushButton("Save")
         self.cancel_btn = QPushButton("Cancel")
@@ -140,20 +150,32 @@ class AddEditStudentDialog(QDialog):
         self.save_btn.clicked.connect(self.save_student)
         self.cancel_btn.clicked.connect(self.reject)
         
+    def scan_card(self):
+        barcode, ok = QInputDialog.getText(self, "Scan ID Card", "Scan or enter ID card barcode:")
+        if ok and barcode.strip():
+            self.card_input.setText(barcode.strip())
+        
     def save_student(self):
         name = self.name_input.text().strip()
         sclass = self.class_input.text().strip()
         contact = self.contact_input.text().strip()
+        card = self.card_input.text().strip() or None
         
         if not name:
             QMessageBox.warning(self, "Validation Error", "Name is required.")
             return
+        if card:
+            existing = self.dbm.get_student_by_barcode(card)
+            if existing and (not self.student or existing['student_id'] != self.student['student_id']):
+                QMessageBox.warning(self, "Duplicate Barcode",
+                                    f"ID card already assigned to: {existing['name']}")
+                return
             
         try:
             if self.student:
-                self.dbm.update_student(self.student['student_id'], name, sclass, contact)
+                self.dbm.update_student(self.student['student_id'], name, sclass, contact, card)
             else:
-                self.dbm.add_student(name, sclass, contact)
+                self.dbm.add_student(name, sclass, contact, card)
                 
             QMessageBox.information(self, "Success", "Student saved successfully.")
             self.accept()
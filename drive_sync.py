@@ -0,0 +1,246 @@
+import random
+import time
+from bisect import bisect_left
+from itertools import islice
+
+from db_manager import SYNC_TABLES, _chunks
+from reports import build_report
+from sync_backends import QuotaError
+
+# A delta touching more than this share of a table's rows is cheaper as a full upload.
+FULL_SYNC_RATIO = 0.5
+# Full uploads read UPLOAD_CHUNK rows at a time and send BLOCKS_PER_REQUEST such
+# blocks per batched range update.
+UPLOAD_CHUNK = 1000
+BLOCKS_PER_REQUEST = 5
+# Quota errors are retried with exponential backoff.
+MAX_RETRIES = 6
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 64.0
+REPORT_SHEET = "MyLibrary_ReportsPage"
+
+
+def sheet_title(table):
+    return f"MyLibrary_{table}"
+
+
+def _a1(row, col):
+    """A1 reference for a 1-based row and column, e.g. (2, 28) -> "AB2"."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return f"{letters}{row}"
+
+
+def _cells(row):
+    return ["" if v is None else v for v in row]
+
+
+def _retrying(call, *args, idempotent=True, **kwargs):
+    """call(*args, **kwargs), retried with exponential backoff and jitter on quota errors.
+
+    A call that is not idempotent is retried only after a 429, which means the
+    request was refused; a 5xx may have been applied already and is raised.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return call(*args, **kwargs)
+        except QuotaError as e:
+            if attempt == MAX_RETRIES or (not idempotent and e.status != 429):
+                raise
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def _columns(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return [r[1] for r in c.fetchall()]
+
+
+def _start_tracking(dbm, table):
+    """Make the change-log triggers cover table and return the sequence reached so far.
+
+    Rows read after this call are at least as new as the returned sequence, so
+    acknowledging it never skips a change.
+    """
+    with dbm.transaction() as c:
+        c.execute("INSERT OR IGNORE INTO sync_state (tbl) VALUES (?)", (table,))
+        c.execute("SELECT IFNULL(MAX(seq), 0) FROM changes")
+        return c.fetchone()[0]
+
+
+def full_sync(dbm, sheet, table, progress=None):
+    """Replace the sheet with every row of table and rebuild the row map.
+
+    Rows are streamed from the cursor in UPLOAD_CHUNK blocks and sent several blocks
+    per batched range update. progress(done_rows, total_rows) follows each request.
+    """
+    seq = _start_tracking(dbm, table)
+    c = dbm.read_cursor()
+    columns = _columns(c, table)
+    c.execute(f"SELECT COUNT(*) FROM {table}")
+    total = c.fetchone()[0]
+    _retrying(sheet.clear)
+    grid_rows = total + 1
+    _retrying(sheet.resize, rows=grid_rows, cols=len(columns))
+    row_ids = []
+    blocks = [{"range": _a1(1, 1), "values": [columns]}]
+    next_row = 2
+
+    def send(blocks):
+        nonlocal grid_rows
+        if next_row - 1 > grid_rows:  # rows were added since the count
+            grid_rows = next_row - 1
+            _retrying(sheet.resize, rows=grid_rows)
+        _retrying(sheet.write, blocks)
+        if progress:
+            progress(len(row_ids), max(total, len(row_ids)))
+
+    c.execute(f"SELECT rowid, * FROM {table} ORDER BY rowid")
+    while True:
+        rows = c.fetchmany(UPLOAD_CHUNK)
+        if not rows:
+            break
+        blocks.append({"range": f"{_a1(next_row, 1)}:{_a1(next_row + len(rows) - 1, len(columns))}",
+                       "values": [_cells(r[1:]) for r in rows]})
+        row_ids.extend(r[0] for r in rows)
+        next_row += len(rows)
+        if len(blocks) >= BLOCKS_PER_REQUEST:
+            send(blocks)
+            blocks = []
+    if blocks:
+        send(blocks)
+    with dbm.transaction() as w:
+        w.execute("DELETE FROM sync_rows WHERE tbl=?", (table,))
+        w.executemany("INSERT INTO sync_rows (tbl, row_id, sheet_row) VALUES (?,?,?)",
+                      ((table, row_id, i) for i, row_id in enumerate(row_ids, 2)))
+        _acknowledge(w, table, seq, sheet.id, columns, len(row_ids))
+    return len(row_ids)
+
+
+def _acknowledge(c, table, seq, target, columns, row_count):
+    c.execute("""UPDATE sync_state SET target=?, columns=?, row_count=?, last_seq=? WHERE tbl=?""",
+              (target, ",".join(columns), row_count, seq, table))
+    c.execute("DELETE FROM changes WHERE tbl=? AND seq<=?", (table, seq))
+
+
+def delta_sync(dbm, sheet, table, state):
+    """Push the rows of table changed since state's last_seq; None if a full sync is needed.
+
+    Deleted rows are removed with one batched request, and updated and new rows are
+    written with one batched range update. Returns the number of rows pushed.
+    """
+    c = dbm.read_cursor()
+    c.execute("SELECT row_id, MAX(seq) FROM changes WHERE tbl=? AND seq>? GROUP BY row_id",
+              (table, state["last_seq"]))
+    changed = c.fetchall()
+    if not changed:
+        return 0
+    seq = max(r[1] for r in changed)
+    ids = sorted(r[0] for r in changed)
+    if len(ids) > max(1, state["row_count"]) * FULL_SYNC_RATIO:
+        return None
+    current, mapped = {}, {}
+    for chunk, marks in _chunks(ids):
+        c.execute(f"SELECT rowid, * FROM {table} WHERE rowid IN ({marks})", chunk)
+        current.update((r[0], r) for r in c.fetchall())
+        c.execute(f"SELECT row_id, sheet_row FROM sync_rows WHERE tbl=? AND row_id IN ({marks})",
+                  [table] + chunk)
+        mapped.update((r[0], r[1]) for r in c.fetchall())
+
+    # Where every written row ends up once the deleted rows are gone.
+    deleted = sorted(mapped[i] for i in ids if i not in current and i in mapped)
+    row_count = state["row_count"] - len(deleted)
+    appended = [i for i in ids if i in current and i not in mapped]
+    placed = {i: mapped[i] - bisect_left(deleted, mapped[i]) for i in ids if i in current and i in mapped}
+    placed.update((i, row_count + n) for n, i in enumerate(appended, 2))
+    row_count += len(appended)
+
+    # Until this sync is acknowledged the sheet may be half-updated; force a full
+    # sync next time if anything below fails.
+    with dbm.transaction() as w:
+        w.execute("UPDATE sync_state SET target=NULL WHERE tbl=?", (table,))
+    if deleted:
+        try:
+            _retrying(sheet.delete_rows, deleted, idempotent=False)
+        except QuotaError as e:
+            if e.status == 429:
+                raise
+            return None  # the rows may or may not be gone; target is unset, so re-upload in full
+    if appended:
+        _retrying(sheet.resize, rows=row_count + 1)
+    columns = state["columns"].split(",")
+    data = [{"range": f"{_a1(placed[i], 1)}:{_a1(placed[i], len(columns))}", "values": [_cells(current[i][1:])]}
+            for i in sorted(placed, key=placed.get)]
+    if data:
+        _retrying(sheet.write, data)
+
+    with dbm.transaction() as w:
+        for r in reversed(deleted):
+            w.execute("DELETE FROM sync_rows WHERE tbl=? AND sheet_row=?", (table, r))
+            w.execute("UPDATE sync_rows SET sheet_row = sheet_row - 1 WHERE tbl=? AND sheet_row>?", (table, r))
+        w.executemany("INSERT INTO sync_rows (tbl, row_id, sheet_row) VALUES (?,?,?)",
+                      [(table, i, placed[i]) for i in appended])
+        _acknowledge(w, table, seq, state["target"], columns, row_count)
+    return len(deleted) + len(data)
+
+
+def sync_table(dbm, backend, table, progress=None):
+    """Bring one table's spreadsheet up to date, incrementally when possible.
+
+    Returns the number of rows sent; progress(done_rows, total_rows) reports along the way.
+    """
+    sheet, created = _retrying(backend.open_sheet, sheet_title(table))
+    c = dbm.read_cursor()
+    c.execute("SELECT * FROM sync_state WHERE tbl=?", (table,))
+    state = c.fetchone()
+    if (not created and state is not None and state["target"] == sheet.id
+            and state["columns"] == ",".join(_columns(c, table))):
+        pushed = delta_sync(dbm, sheet, table, state)
+        if pushed is not None:
+            if progress:
+                progress(pushed, pushed)
+            return pushed
+    return full_sync(dbm, sheet, table, progress)
+
+
+def sync_report(dbm, backend, name, progress=None):
+    """Replace the reports spreadsheet with a fresh snapshot of report name.
+
+    The report is read with one query (see reports.build_report) and uploaded like
+    a full sync. Returns the number of rows sent.
+    """
+    snapshot = build_report(dbm, name)
+    sheet, _ = _retrying(backend.open_sheet, REPORT_SHEET)
+    _retrying(sheet.clear)
+    _retrying(sheet.resize, rows=len(snapshot) + 1, cols=len(snapshot.headers))
+    blocks = [{"range": _a1(1, 1), "values": [list(snapshot.headers)]}]
+    rows = snapshot.rows()
+    done = 0
+    while True:
+        chunk = [_cells(r) for r in islice(rows, UPLOAD_CHUNK)]
+        if chunk:
+            blocks.append({"range": f"{_a1(done + 2, 1)}:{_a1(done + 1 + len(chunk), len(snapshot.headers))}",
+                           "values": chunk})
+            done += len(chunk)
+        if blocks and (len(blocks) >= BLOCKS_PER_REQUEST or not chunk):
+            _retrying(sheet.write, blocks)
+            blocks = []
+            if progress:
+                progress(done, len(snapshot))
+        if not chunk:
+            return done
+
+
+def sync_tables(dbm, backend, tables=SYNC_TABLES):
+    """Sync tables one after another; the GUI runs sync_table for each table in parallel."""
+    return {table: sync_table(dbm, backend, table) for table in tables}
+
+
+def reset_sync(dbm):
+    """Forget what was synced (e.g. after switching Google accounts); the next sync is full."""
+    with dbm.transaction() as c:
+        c.execute("DELETE FROM sync_state")
+        c.execute("DELETE FROM sync_rows")
+        c.execute("DELETE FROM changes")
@@ -0,0 +1,134 @@
+import json
+import os
+import pickle
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+import gspread
+import requests
+from google.auth.transport.requests import Request
+from google_auth_oauthlib.flow import InstalledAppFlow
+
+SCOPES = [
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/spreadsheets"
+]
+CLIENT_CONFIG_URL = "https://www.dropbox.com/scl/fi/nhghxpmnefc2g45uba15h/credentials.json?rlkey=uqlgnm5lori28rpy8qx6hkuj5&st=8l76xdn6&dl=1"
+# Refresh access tokens this long before they expire, so a sync never starts with
+# a token that lapses halfway through.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temporary file and rename, so a crash never leaves half a file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class GoogleSession:
+    """Google credentials and one gspread client, kept in memory for the app's lifetime.
+
+    The token file is read once, refreshed shortly before expiry and saved atomically.
+    The OAuth client config is downloaded on first login and cached next to the token.
+    Safe to use from worker threads.
+    """
+
+    def __init__(self, token_path, client_config_path):
+        self.token_path = token_path
+        self.client_config_path = client_config_path
+        self.lock = threading.RLock()
+        self.creds = None
+        self.loaded = False
+        self.config = None
+        self.gspread_client = None
+
+    def _load(self):
+        if not self.loaded:
+            self.loaded = True
+            if os.path.exists(self.token_path):
+                try:
+                    with open(self.token_path, "rb") as token:
+                        self.creds = pickle.load(token)
+                except Exception as e:
+                    print("Error reading Google token:", e)
+        return self.creds
+
+    def _save(self, creds):
+        _write_atomic(self.token_path, pickle.dumps(creds))
+        if creds is not self.creds:
+            self.gspread_client = None
+        self.creds = creds
+        self.loaded = True
+
+    def _expiring(self, creds):
+        if creds.expiry is None:
+            return not creds.valid
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth uses naive UTC
+        return creds.expiry - now < REFRESH_MARGIN
+
+    def is_logged_in(self):
+        """True if there is a token that is valid or can be refreshed; no network access."""
+        with self.lock:
+            creds = self._load()
+            return bool(creds and (creds.valid or creds.refresh_token))
+
+    def credentials(self):
+        """Valid credentials, refreshed ahead of expiry; runs the login flow if there are none."""
+        with self.lock:
+            creds = self._load()
+            if creds and creds.refresh_token and self._expiring(creds):
+                creds.refresh(Request())
+                self._save(creds)
+            elif not creds or not creds.valid:
+                creds = self.login()
+            return creds
+
+    def client(self):
+        """The authorized gspread client, built once per login."""
+        with self.lock:
+            creds = self.credentials()
+            if self.gspread_client is None:
+                self.gspread_client = gspread.authorize(creds)
+            return self.gspread_client
+
+    def client_config(self):
+        with self.lock:
+            if self.config is None and os.path.exists(self.client_config_path):
+                with open(self.client_config_path, encoding="utf-8") as f:
+                    self.config = json.load(f)
+            if self.config is None:
+                resp = requests.get(CLIENT_CONFIG_URL, timeout=30)
+                if resp.status_code != 200:
+                    raise Exception(f"Failed to fetch credentials from Dropbox. Status: {resp.status_code}")
+                self.config = resp.json()
+                _write_atomic(self.client_config_path, json.dumps(self.config).encode("utf-8"))
+            return self.config
+
+    def login(self):
+        """Run the browser login flow and keep the new credentials."""
+        with self.lock:
+            flow = InstalledAppFlow.from_client_config(self.client_config(), SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save(creds)
+            return creds
+
+    def logout(self):
+        """Forget the credentials and delete the token; False if nobody was logged in."""
+        with self.lock:
+            self.creds = None
+            self.loaded = True
+            self.gspread_client = None
+            if os.path.exists(self.token_path):
+                os.remove(self.token_path)
+                return True
+            return False
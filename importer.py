@@ -0,0 +1,162 @@
+import argparse
+import csv
+import sys
+from datetime import date
+from itertools import islice
+
+from db_manager import DatabaseManager, DB_FILE, _chunks
+
+BATCH_SIZE = 1000
+
+BOOK_COLUMNS = ["title", "author", "category", "quantity", "barcode"]
+STUDENT_COLUMNS = ["name", "class", "contact"]
+
+
+def read_csv_rows(csv_path):
+    """Yield (line_no, row) pairs with lower-cased headers, one row at a time."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames:
+            reader.fieldnames = [h.strip().lower() for h in reader.fieldnames]
+        for row in reader:
+            yield reader.line_num, {k: (v or "").strip() for k, v in row.items() if k}
+
+
+def clean_book(row):
+    """Return (title, author, category, quantity, barcode) or raise ValueError."""
+    title = row.get("title", "")
+    if not title:
+        raise ValueError("Title is required.")
+    quantity = row.get("quantity", "") or "1"
+    if not quantity.isdigit():
+        raise ValueError(f"Invalid quantity: {quantity!r}")
+    return (title, row.get("author", ""), row.get("category", ""), int(quantity),
+            row.get("barcode", "") or None)
+
+
+def clean_student(row):
+    """Return (name, class, contact) or raise ValueError."""
+    name = row.get("name", "")
+    if not name:
+        raise ValueError("Name is required.")
+    return (name, row.get("class", ""), row.get("contact", ""))
+
+
+def _validated(rows, clean, result):
+    for line_no, row in rows:
+        try:
+            yield clean(row)
+        except ValueError as e:
+            result["rejected"].append((line_no, str(e)))
+
+
+def _batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _write_books(c, batch, result):
+    today = date.today().strftime("%Y-%m-%d")
+    with_barcode = [r for r in batch if r[4]]
+    without_barcode = [r for r in batch if not r[4]]
+    if with_barcode:
+        barcodes = list({r[4] for r in with_barcode})
+        existing = 0
+        for chunk, marks in _chunks(barcodes):
+            c.execute(f"SELECT COUNT(*) FROM books WHERE barcode IN ({marks})", chunk)
+            existing += c.fetchone()[0]
+        # The CSV gives the total copies, while books.quantity counts the copies on
+        # the shelf, so copies still out on loan are subtracted.
+        c.executemany("""INSERT INTO books (title, author, category, quantity, barcode, added_date)
+                         VALUES (?,?,?,?,?,?)
+                         ON CONFLICT(barcode) DO UPDATE SET
+                             title=excluded.title, author=excluded.author, category=excluded.category,
+                             quantity=MAX(0, excluded.quantity - (SELECT COUNT(*) FROM issued_books
+                                 WHERE book_id=books.book_id AND status='Issued'))""",
+                      [r + (today,) for r in with_barcode])
+        result["updated"] += existing
+        result["inserted"] += len(barcodes) - existing
+    if without_barcode:
+        c.executemany("""INSERT INTO books (title, author, category, quantity, barcode, added_date)
+                         VALUES (?,?,?,?,?,?)""",
+                      [r + (today,) for r in without_barcode])
+        result["inserted"] += len(without_barcode)
+
+
+def _write_students(c, batch, result):
+    # Students have no unique column, so (name, class) is the natural key.
+    existing = {}
+    for chunk, marks in _chunks(list({r[0] for r in batch})):
+        c.execute(f"SELECT student_id, name, class FROM students WHERE name IN ({marks})", chunk)
+        existing.update(((r["name"], r["class"] or ""), r["student_id"]) for r in c.fetchall())
+    updates, inserts = {}, {}
+    for name, sclass, contact in batch:
+        sid = existing.get((name, sclass))
+        if sid is not None:
+            updates[sid] = (name, sclass, contact, sid)
+        else:
+            inserts[(name, sclass)] = (name, sclass, contact)
+    c.executemany("UPDATE students SET name=?, class=?, contact=? WHERE student_id=?", list(updates.values()))
+    c.executemany("INSERT INTO students (name, class, contact) VALUES (?,?,?)", list(inserts.values()))
+    result["updated"] += len(updates)
+    result["inserted"] += len(inserts)
+
+
+def _import(dbm, csv_path, clean, write, batch_size, progress, cancelled):
+    result = {"inserted": 0, "updated": 0, "rejected": []}
+    processed = 0
+    records = _validated(read_csv_rows(csv_path), clean, result)
+    for batch in _batches(records, batch_size):
+        if cancelled and cancelled():
+            break
+        with dbm.transaction() as c:
+            write(c, batch, result)
+        processed += len(batch)
+        if progress:
+            progress(processed, len(result["rejected"]))
+    return result
+
+
+def import_books(dbm, csv_path, batch_size=BATCH_SIZE, progress=None, cancelled=None):
+    """Stream books from a CSV (title, author, category, quantity, barcode) into the catalog.
+
+    Rows with a barcode already in the catalog update that book. quantity is the total
+    number of copies; copies currently on loan are not counted as available. Returns a
+    dict with inserted/updated counts and a list of (line_no, reason) rejected rows.
+    """
+    return _import(dbm, csv_path, clean_book, _write_books, batch_size, progress, cancelled)
+
+
+def import_students(dbm, csv_path, batch_size=BATCH_SIZE, progress=None, cancelled=None):
+    """Stream students from a CSV (name, class, contact); an existing name+class is updated."""
+    return _import(dbm, csv_path, clean_student, _write_students, batch_size, progress, cancelled)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import books or students from CSV.")
+    parser.add_argument("table", choices=["books", "students"])
+    parser.add_argument("csv_path")
+    parser.add_argument("--db", default=DB_FILE, help="Path to library.db")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    dbm = DatabaseManager(args.db)
+    run = import_books if args.table == "books" else import_students
+    try:
+        result = run(dbm, args.csv_path, batch_size=args.batch_size,
+                     progress=lambda done, bad: print(f"\r{done} rows imported, {bad} rejected", end=""))
+    finally:
+        dbm.close()
+    print()
+    print(f"Inserted: {result['inserted']}  Updated: {result['updated']}  Rejected: {len(result['rejected'])}")
+    for line_no, reason in result["rejected"]:
+        print(f"  line {line_no}: {reason}", file=sys.stderr)
+    return 1 if result["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import os
 import sys
 from PyQt6.QtWidgets import QApplication
 from db_manager import DatabaseManager
@@ -6,6 +7,9 @@ from main_gui import LoginWindow
 def main():
     app = QApplication(sys.argv)
     dbm = DatabaseManager()
+    # Opt-in SQL tracing: LIBRARY_SLOW_QUERY_MS=50 python main.py
+    if os.environ.get("LIBRARY_SLOW_QUERY_MS"):
+        dbm.enable_query_tracing(slow_ms=float(os.environ["LIBRARY_SLOW_QUERY_MS"]))
     login = LoginWindow(dbm)
     login.show()
     sys.exit(app.exec())
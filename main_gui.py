@@ -1,20 +1,27 @@
-import pickle
-import gspread
-import requests
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 import os
-from datetime import datetime, date
+import math
+from datetime import date
 from dialogs import AddEditBookDialog, AddEditStudentDialog
 from PyQt6.QtWidgets import (
     QWidget, QMainWindow, QMessageBox, QLabel, QLineEdit, QPushButton,
-    QVBoxLayout, QHBoxLayout, QStackedWidget, QTableWidget, QTableWidgetItem,
-    QHeaderView, QGroupBox, QFormLayout, QComboBox, QDateEdit, QFileDialog, QProgressBar,QAbstractItemView,
-    QDialog, QApplication, QInputDialog, QFrame, QScrollArea, QSizePolicy,QToolButton, QMenu
+    QVBoxLayout, QHBoxLayout, QStackedWidget,
+    QGroupBox, QFormLayout, QDateEdit, QFileDialog, QProgressBar,
+    QDialog, QApplication, QInputDialog, QFrame, QScrollArea, QSizePolicy,QToolButton, QMenu,
+    QListWidget, QListWidgetItem
 )
 from PyQt6.QtCore import Qt, QDate, QTimer, pyqtSignal, QRunnable, QObject, QThreadPool
-from PyQt6.QtGui import QIcon, QFont,QPixmap,QAction
-from db_manager import DatabaseManager
+from PyQt6.QtGui import QIcon, QFont,QPixmap,QAction,QShortcut,QKeySequence
+from db_manager import DatabaseManager, SYNC_TABLES
+from importer import import_books, import_students
+from table_models import PagedTableModel, SnapshotTableModel, make_table_view, selected_ids, select_id
+from query_service import QueryService
+from search_cache import SearchCache
+from pickers import RecordPicker, student_label, book_label
+from circulation import ScanSessionDialog
+from drive_sync import sync_table, sync_report, reset_sync
+from reports import build_report, export_report_csv
+from sync_backends import GspreadBackend
+from google_auth import GoogleSession
 import sys
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -28,159 +35,251 @@ def resource_path(relative_path):
 
 # GOOGLE AUTH & DRIVE FUNCTIONS
 
+# One session for the app's lifetime: the token is read once and refreshed ahead of expiry,
+# and the gspread client is reused by every sync.
+google_session = GoogleSession(resource_path("token.pickle"), resource_path("client_config.json"))
+
 def get_user_gsheet_client():
     """Authenticate user with Google OAuth and return gspread client."""
-    SCOPES = [
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/spreadsheets"
-    ]
-    
-    DROPBOX_LINK = "https://www.dropbox.com/scl/fi/nhghxpmnefc2g45uba15h/credentials.json?rlkey=uqlgnm5lori28rpy8qx6hkuj5&st=8l76xdn6&dl=1"
-
-    creds = None
-    if os.path.exists(resource_path("token.pickle")):
-        with open(resource_path("token.pickle"), "rb") as token:
-            creds = pickle.load(token)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            resp = requests.get(DROPBOX_LINK)
-            if resp.status_code != 200:
-                raise Exception(f"Failed to fetch credentials from Dropbox. Status: {resp.status_code}")
-            creds_json = resp.json()
-            
-            flow = InstalledAppFlow.from_client_config(creds_json, SCOPES)
-            creds = flow.run_local_server(port=0)
-
-        with open(resource_path("token.pickle"), "wb") as token:
-            pickle.dump(creds, token)
-
-    return gspread.authorize(creds)
+    return google_session.client()
 
 def google_login():
     """Force user to log in with Google and refresh credentials."""
-    SCOPES = [
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/spreadsheets"
-    ]
-    DROPBOX_LINK = "https://www.dropbox.com/scl/fi/nhghxpmnefc2g45uba15h/credentials.json?rlkey=uqlgnm5lori28rpy8qx6hkuj5&st=8l76xdn6&dl=1"
-    resp = requests.get(DROPBOX_LINK)
-    if resp.status_code != 200:
-        raise Exception(f"Failed to fetch credentials from Dropbox. Status: {resp.status_code}")
-    creds_json = resp.json()
-    flow = InstalledAppFlow.from_client_config(creds_json, SCOPES)
-    creds = flow.run_local_server(port=0)
-    with open(resource_path("token.pickle"), "wb") as token:
-        pickle.dump(creds, token)
-    return creds
+    return google_session.login()
 
 def google_logout():
     """Logout Google by deleting local token."""
-    if os.path.exists(resource_path("token.pickle")):
-        os.remove(resource_path("token.pickle"))
-        return True
-    return False
+    return google_session.logout()
+
+SEARCH_DEBOUNCE_MS = 250
 
 class WorkerSignals(QObject):
     finished = pyqtSignal()
     error = pyqtSignal(str)
     success = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+
+class SyncSignals(QObject):
+    table_progress = pyqtSignal(str, int, int)  # table, rows done, total rows
+    table_done = pyqtSignal(str, str)           # table, error message ("" on success)
+
+class TableSyncWorker(QRunnable):
+    def __init__(self, db_path, backend, table, signals):
+        """Sync one table to its spreadsheet on a pool thread through its own DatabaseManager."""
+        super().__init__()
+        self.db_path = db_path
+        self.backend = backend
+        self.table = table
+        self.signals = signals
+
+    def run(self):
+        dbm = None
+        error = ""
+        try:
+            dbm = DatabaseManager(self.db_path)
+            sync_table(dbm, self.backend, self.table,
+                       progress=lambda done, total: self.signals.table_progress.emit(self.table, done, total))
+        except Exception as e:
+            error = str(e)
+        finally:
+            if dbm:
+                dbm.close()
+            self.signals.table_done.emit(self.table, error)
 
 class DriveSyncWorker(QRunnable):
-    def __init__(self, dbm, main_window=None):
+    def __init__(self, dbm, report=None, pool=None):
         """
         :param dbm: Database manager
-        :param main_window: Optional reference to main GUI to access Reports page
+        :param report: Optional report name ("all", "overdue", "top") to publish as the Reports sheet
+        :param pool: QThreadPool that runs one TableSyncWorker per synced table
         """
         super().__init__()
         self.dbm = dbm
-        self.main_window = main_window
+        self.report = report
+        self.pool = pool or QThreadPool.globalInstance()
         self.signals = WorkerSignals()
+        self.sync_signals = SyncSignals()
 
     def run(self):
+        started = []
         try:
-            # 1️⃣ Sync database tables
-            self.sync_db_tables()
-
-            # 2️⃣ Sync Reports page if main_window is provided
-            if self.main_window:
-                self.sync_reports_page()
-
-            self.signals.success.emit("Library data and Reports Page synced to Google Drive!")
+            backend = GspreadBackend(get_user_gsheet_client())
+            # 1️⃣ Sync database tables, each on its own pool thread
+            for table in SYNC_TABLES:
+                self.pool.start(TableSyncWorker(self.dbm.db_path, backend, table, self.sync_signals))
+                started.append(table)
+
+            # 2️⃣ Sync a fresh snapshot of the report shown on the Reports page
+            if self.report:
+                sync_report(self.dbm, backend, self.report,
+                            progress=lambda done, total: self.sync_signals.table_progress.emit("reports", done, total))
         except Exception as e:
             self.signals.error.emit(str(e))
+            for table in SYNC_TABLES:
+                if table not in started:
+                    self.sync_signals.table_done.emit(table, str(e))
         finally:
             self.signals.finished.emit()
 
-    def sync_db_tables(self):
-        client = get_user_gsheet_client()
-        tables = ["books", "students", "issued_books", "users"]
+class ImportWorker(QRunnable):
+    def __init__(self, db_path, table, csv_path):
+        """Bulk-import a CSV on a pool thread through its own DatabaseManager connection."""
+        super().__init__()
+        self.db_path = db_path
+        self.table = table
+        self.csv_path = csv_path
+        self.cancel_requested = False
+        self.signals = WorkerSignals()
 
-        for table in tables:
-            sheet_title = f"MyLibrary_{table}"
-            try:
-                sheet = client.open(sheet_title).sheet1
-                sheet.clear()
-            except gspread.SpreadsheetNotFound:
-                sheet = client.create(sheet_title).sheet1
-
-            c = self.dbm.conn.cursor()
-            c.execute(f"SELECT * FROM {table}")
-            rows = c.fetchall()
-            if not rows:
-                continue
+    def run(self):
+        dbm = None
+        try:
+            dbm = DatabaseManager(self.db_path)
+            run_import = import_books if self.table == "books" else import_students
+            result = run_import(dbm, self.csv_path, progress=self.signals.progress.emit,
+                                cancelled=lambda: self.cancel_requested)
+            msg = (f"Inserted: {result['inserted']}\nUpdated: {result['updated']}\n"
+                   f"Rejected: {len(result['rejected'])}")
+            if self.cancel_requested:
+                msg = "Import cancelled.\n" + msg
+            if result["rejected"]:
+                lines = [f"Line {n}: {reason}" for n, reason in result["rejected"][:20]]
+                if len(result["rejected"]) > 20:
+                    lines.append(f"... and {len(result['rejected']) - 20} more")
+                msg += "\n\n" + "\n".join(lines)
+            self.signals.success.emit(msg)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            if dbm:
+                dbm.close()
+            self.signals.finished.emit()
 
-            columns = [col[0] for col in c.description]
-            sheet.append_row(columns)
-            for row in rows:
-                sheet.append_row(list(row))
+class ExportWorker(QRunnable):
+    def __init__(self, dbm, archive_path):
+        """Export every table into one zip archive on a pool thread."""
+        super().__init__()
+        self.dbm = dbm
+        self.archive_path = archive_path
+        self.cancel_requested = False
+        self.signals = WorkerSignals()
 
-    def sync_reports_page(self):
-        client = get_user_gsheet_client()
-        sheet_title = "MyLibrary_ReportsPage"
+    def run(self):
         try:
-            sheet = client.open(sheet_title).sheet1
-            sheet.clear()
-        except gspread.SpreadsheetNotFound:
-            sheet = client.create(sheet_title).sheet1
-
-        table = self.main_window.report_table
+            counts = self.dbm.export_archive(self.archive_path, progress=self.signals.progress.emit,
+                                             cancelled=lambda: self.cancel_requested)
+            if counts is None:
+                self.signals.error.emit("Export cancelled.")
+            else:
+                summary = "\n".join(f"{table}: {n} rows" for table, n in counts.items())
+                self.signals.success.emit(f"Exported to {self.archive_path}\n\n{summary}")
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
 
-        headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount())]
-    
-        all_rows = [headers] 
+class DashboardChart(FigureCanvas):
+    """Matplotlib canvas that keeps one figure for its lifetime.
+
+    Subclasses build their artists once and update them in set_data, which redraws
+    only when the values differ. Resizes are debounced so the layout and font
+    scaling run once after the user stops dragging.
+    """
+    RESIZE_DELAY_MS = 150
+
+    def __init__(self, title, parent=None):
+        self.fig = Figure(figsize=(4, 3), dpi=100)
+        super().__init__(self.fig)
+        self.setParent(parent)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_title(title)
+        self.data = None
+        self.scale = None
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(self.RESIZE_DELAY_MS)
+        self.resize_timer.timeout.connect(self.relayout)
+
+    def set_data(self, data):
+        if data == self.data:
+            return False
+        self.data = data
+        self.update_artists(data)
+        self.relayout()
+        return True
 
+    def update_artists(self, data):
+        raise NotImplementedError
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resize_timer.start()
+
+    def relayout(self):
+        scale = round(max(0.5, min(1.5, self.width() / self.logicalDpiX() / 4)), 1)
+        if scale != self.scale:
+            self.scale = scale
+            for label in (self.ax.get_xticklabels() + self.ax.get_yticklabels()):
+                label.set_fontsize(8 * scale)
+            self.ax.title.set_fontsize(12 * scale)
+            self.ax.xaxis.label.set_fontsize(9 * scale)
+            self.ax.yaxis.label.set_fontsize(9 * scale)
+        self.fig.tight_layout()
+        self.draw_idle()
+
+
+class BarChart(DashboardChart):
+    """Fixed set of labelled bars whose heights are updated in place."""
+
+    def __init__(self, title, labels, ylabel="", color="#007bff", parent=None):
+        super().__init__(title, parent)
+        self.bars = self.ax.bar(labels, [0] * len(labels), color=color)
+        self.ax.set_ylabel(ylabel)
+        self.ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+    def update_artists(self, values):
+        for bar, value in zip(self.bars, values):
+            bar.set_height(value)
+        self.ax.set_ylim(0, max(max(values, default=0), 1) * 1.1)
+        self.scale = None  # new tick labels need the current font size
+
+
+class PieChart(DashboardChart):
+    """Pie whose wedges and labels are moved in place when the values change."""
+
+    def __init__(self, title, labels, colors, start_angle=90, parent=None):
+        super().__init__(title, parent)
+        self.start_angle = start_angle
+        self.wedges, self.labels, self.pcts = self.ax.pie(
+            [1] * len(labels), labels=labels, autopct="%1.1f%%", colors=colors, startangle=start_angle)
+        self.no_data = self.ax.text(0, 0, "No Data", ha="center", va="center", fontsize=12)
+        self.ax.axis("equal")
+
+    def update_artists(self, values):
+        total = sum(values)
+        self.no_data.set_visible(total <= 0)
+        theta = self.start_angle
+        for wedge, label, pct, value in zip(self.wedges, self.labels, self.pcts, values):
+            shown = total > 0 and value > 0
+            for artist in (wedge, label, pct):
+                artist.set_visible(shown)
+            if not shown:
+                continue
+            span = 360 * value / total
+            wedge.set_theta1(theta)
+            wedge.set_theta2(theta + span)
+            mid = math.radians(theta + span / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment("left" if x >= 0 else "right")
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{100 * value / total:.1f}%")
+            theta += span
 
-        for row in range(table.rowCount()):
-            row_data = [
-                table.item(row, col).text() if table.item(row, col) else ""
-                for col in range(table.columnCount())
-         ]
-            all_rows.append(row_data)
 
-        sheet.append_rows(all_rows, value_input_option="USER_ENTERED")
 def is_google_logged_in():
-    """Check if a valid Google login token exists."""
-    token_path = resource_path("token.pickle")
-    if not os.path.exists(token_path):
-        return False
-
-    try:
-        with open(token_path, "rb") as token:
-            creds = pickle.load(token)
-
-        if creds and creds.valid:
-            return True
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            with open(token_path, "wb") as token:
-                pickle.dump(creds, token)
-            return True
-    except Exception as e:
-        print("Error checking Google login:", e)
-    return False
+    """Check if a usable Google login token exists, without touching the network."""
+    return google_session.is_logged_in()
 
 # Login Window
 class LoginWindow(QWidget):
@@ -241,6 +340,8 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.dbm = dbm
         self.logged_in_user = logged_in_user
+        self.queries = QueryService(dbm, self)
+        self.search_cache = SearchCache(dbm)
         self.setWindowTitle("Library Tracker - Dashboard")
         self.setWindowIcon(QIcon(resource_path("library.ico")))
         self.resize(1000, 650)
@@ -316,11 +417,21 @@ class MainWindow(QMainWindow):
         else:
             self.btn_google_logout.hide()
 
+        self.page_versions = {}
+        self.scan_session = None
         self.switch_page(0)
         self.overdue_timer = QTimer()
         self.overdue_timer.timeout.connect(self.check_overdue)
         self.overdue_timer.start(60 * 1000)  # 60 sec
         self.check_overdue()
+        if self.dbm.tracer:
+            QShortcut(QKeySequence("Ctrl+Shift+Q"), self, activated=self.show_query_stats)
+
+    def show_query_stats(self):
+        """Dump per-statement SQL timings (only wired up when query tracing is on)."""
+        stats = self.dbm.dump_query_stats()
+        QMessageBox.information(self, "Query Statistics",
+                                f"Statistics written to {self.dbm.tracer.log_path}\n\n{stats[:3000]}")
 
     def prompt_barcode_scan(self):
         """Handle barcode scanning in different contexts based on current page"""
@@ -369,28 +480,40 @@ class MainWindow(QMainWindow):
                         self.refresh_books_table()
 
     def scan_barcode_for_issue(self):
-        """Scan barcode for book issuing"""
-        barcode, ok = QInputDialog.getText(self, "Scan Book for Issue", 
-                                          "Scan book barcode to issue:")
+        """Scan a student ID card or a book barcode for issuing"""
+        barcode, ok = QInputDialog.getText(self, "Scan for Issue", 
+                                          "Scan a student ID card or a book barcode:")
         if ok and barcode.strip():
-            book = self.dbm.get_book_by_barcode(barcode.strip())
-            if book:
-                if book['quantity'] > 0:
-                    for i in range(self.issue_book_combo.count()):
-                        if self.issue_book_combo.itemData(i) == book['book_id']:
-                            self.issue_book_combo.setCurrentIndex(i)
-                            QMessageBox.information(
-                                self, 
-                                "Book Selected", 
-                                f"Book '{book['title']}' selected for issuing.\nPlease select a student and complete the issue."
-                            )
-                            break
-                else:
-                    QMessageBox.warning(self, "No Copies Available", 
-                                      "No copies of this book are available for issuing.")
-            else:
-                QMessageBox.warning(self, "Book Not Found", 
-                                  f"No book found with barcode: {barcode}")
+            self.handle_issue_scan(barcode.strip())
+
+    def handle_issue_scan(self, barcode):
+        """A student card selects the borrower; a book barcode adds the book to the scanned list."""
+        student = self.dbm.get_student_by_barcode(barcode)
+        if student:
+            self.issue_student_picker.set_row(student)
+            self.show_issue_scan_status(f"Student: {student_label(student)}")
+            return
+        book = self.dbm.get_book_by_barcode(barcode)
+        if not book:
+            self.show_issue_scan_status(f"No book or student card found with barcode: {barcode}", error=True)
+            return
+        scanned = self.scanned_issue_books().count(book['book_id'])
+        if book['quantity'] - scanned <= 0:
+            self.show_issue_scan_status(f"No copies of '{book['title']}' are available for issuing.", error=True)
+            return
+        item = QListWidgetItem(f"{book['title']} by {book['author'] or 'Unknown'}")
+        item.setData(Qt.ItemDataRole.UserRole, book['book_id'])
+        self.issue_basket.addItem(item)
+        self.show_issue_scan_status(f"Added '{book['title']}' ({self.issue_basket.count()} scanned)")
+
+    def show_issue_scan_status(self, text, error=False):
+        self.issue_scan_status.setText(text)
+        self.issue_scan_status.setStyleSheet("color: #c62828;" if error else "color: #1b7f3b;")
+        if error:
+            QApplication.beep()
+
+    def scanned_issue_books(self):
+        return [self.issue_basket.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.issue_basket.count())]
 
     def scan_barcode_for_return(self):
         """Scan barcode for book return"""
@@ -399,17 +522,7 @@ class MainWindow(QMainWindow):
         if ok and barcode.strip():
             book = self.dbm.get_book_by_barcode(barcode.strip())
             if book:
-                c = self.dbm.conn.cursor()
-                c.execute("""
-                    SELECT ib.issue_id, ib.book_id, b.title, ib.student_id, s.name as student_name,
-                           ib.issue_date, ib.expected_return_date, ib.status
-                    FROM issued_books ib
-                    LEFT JOIN books b ON ib.book_id=b.book_id
-                    LEFT JOIN students s ON ib.student_id=s.student_id
-                    WHERE b.book_id=? AND ib.status='Issued'
-                """, (book['book_id'],))
-                
-                issued_records = c.fetchall()
+                issued_records = self.dbm.get_open_issues_for_book(book['book_id'])
                 
                 if issued_records:
                     if len(issued_records) == 1:
@@ -457,27 +570,49 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Book Not Found", 
                                   f"No book found with barcode: {barcode}")
 
+    def open_scan_session(self, mode):
+        """Show the continuous scan desk (one per window) in check-out or check-in mode."""
+        if self.scan_session is None:
+            self.scan_session = ScanSessionDialog(self.dbm, mode, service=self.queries, parent=self)
+            self.scan_session.committed.connect(lambda: self.refresh_if_changed(self.stack.currentIndex()))
+        else:
+            self.scan_session.set_mode(mode)
+        self.scan_session.show()
+        self.scan_session.raise_()
+        self.scan_session.activateWindow()
+
     def select_book_in_table(self, book_id):
         """Select a book in the books table"""
-        for row in range(self.books_table.rowCount()):
-            if self.books_table.item(row, 0).text() == str(book_id):
-                self.books_table.selectRow(row)
-                self.books_table.scrollToItem(self.books_table.item(row, 0))
-                break
+        select_id(self.books_table, book_id)
 
     def select_issue_in_return_table(self, issue_id):
         """Select an issue in the return table"""
-        for row in range(self.return_table.rowCount()):
-            if self.return_table.item(row, 0).text() == str(issue_id):
-                self.return_table.selectRow(row)
-                self.return_table.scrollToItem(self.return_table.item(row, 0))
-                break
+        select_id(self.return_table, issue_id)
+
+    def debounce_search(self, line_edit, refresh, delay_ms=SEARCH_DEBOUNCE_MS):
+        """Run refresh once typing in line_edit pauses for delay_ms."""
+        timer = QTimer(line_edit)
+        timer.setSingleShot(True)
+        timer.setInterval(delay_ms)
+        timer.timeout.connect(refresh)
+        line_edit.textEdited.connect(timer.start)
+        line_edit.returnPressed.connect(timer.stop)
+
+    def search_query(self, line_edit):
+        """(search text, data version) so cached results are only reused while the data is unchanged."""
+        return line_edit.text().strip() or None, self.dbm.data_version()
+
+    @staticmethod
+    def bind_status(model, label):
+        model.loaded.connect(lambda n, total: label.setText(f"Showing {n} of {total}"))
+        model.failed.connect(lambda err: label.setText(f"Query failed: {err}"))
 
     def logout_google(self):
         confirm = QMessageBox.question(self, "Confirm Logout", "Logout from Google account?")
         if confirm != QMessageBox.StandardButton.Yes:
             return
         if google_logout():
+            reset_sync(self.dbm)
             QMessageBox.information(self, "Logged Out", "Google account logged out successfully.")
             self.btn_google_logout.hide()  
         else:
@@ -485,18 +620,19 @@ class MainWindow(QMainWindow):
 
     def switch_page(self, index):
         self.stack.setCurrentIndex(index)
-        if index == 0:
-            self.refresh_dashboard()
-        elif index == 1:
-            self.refresh_books_table()
-        elif index == 2:
-            self.refresh_students_table()
-        elif index == 3:
-            self.refresh_issue_page()
-        elif index == 4:
-            self.refresh_return_page()
-        elif index == 5:
-            self.refresh_reports_page()
+        self.refresh_if_changed(index)
+
+    def refresh_if_changed(self, index):
+        """Re-query a page only if the database (or the date, for overdue figures) changed
+        since that page was last loaded."""
+        version = (self.dbm.data_version(), date.today())
+        if self.page_versions.get(index) == version:
+            return False
+        self.page_versions[index] = version
+        refresh = [self.refresh_dashboard, self.refresh_books_table, self.refresh_students_table,
+                   self.refresh_issue_page, self.refresh_return_page, self.refresh_reports_page][index]
+        refresh()
+        return True
 
     def logout(self):
         confirm = QMessageBox.question(self, "Logout", "Logout and return to login screen?")
@@ -514,7 +650,6 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(w)
         layout.setContentsMargins(20, 20, 20, 20)
         layout.setSpacing(20)
-        c = self.dbm.conn.cursor()
         header_layout = QHBoxLayout()
         logo = QLabel()
         pixmap = QPixmap(resource_path("library.ico"))
@@ -571,11 +706,6 @@ class MainWindow(QMainWindow):
         fee_layout.addWidget(self.cards["month_income"])
         fee_layout.addWidget(self.cards["year_income"])
 
-        fee_per_day = self.dbm.get_overdue_fee() or 0
-        today = date.today()
-        month_str = today.strftime("%m")
-        year_str = today.strftime("%Y")
-    
         self.settings_button = QToolButton()
         self.settings_button.setText("⋮")
         self.settings_button.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
@@ -626,50 +756,15 @@ class MainWindow(QMainWindow):
         self.option_show_new_arrivals.toggled.connect(toggle_sections)
         self.option_show_charts.toggled.connect(toggle_sections)
 
-        c.execute("""
-    SELECT expected_return_date, actual_return_date
-    FROM issued_books
-    WHERE status='Returned' AND actual_return_date IS NOT NULL
-""")
-        records = c.fetchall()
-
-        month_income = 0
-        year_income = 0
-
-        for r in records:
-            due = datetime.strptime(r[0], "%Y-%m-%d").date()
-            ret = datetime.strptime(r[1], "%Y-%m-%d").date()
-            overdue_days = (ret - due).days
-            if overdue_days > 0:
-                fee = overdue_days * fee_per_day
-                if ret.strftime("%Y") == year_str:
-                    year_income += fee
-                    if ret.strftime("%m") == month_str:
-                        month_income += fee
-
-        self.lbl_month_income.setText(f"₹{month_income:.2f}")
-        self.lbl_year_income.setText(f"₹{year_income:.2f}")
-
-        
-        c.execute("SELECT IFNULL(SUM(quantity), 0) FROM books")
-        total_books = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM students")
-        total_students = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM issued_books WHERE status='Issued'")
-        issued_books = c.fetchone()[0]
-
-        today = date.today().strftime("%Y-%m-%d")
-        c.execute("""
-        SELECT COUNT(*) FROM issued_books 
-        WHERE status='Issued' AND expected_return_date < ?
-    """, (today,))
-        overdue_books = c.fetchone()[0]
-        self.lbl_total_books.setText(str(total_books))
-        self.lbl_total_students.setText(str(total_students))
-        self.lbl_issued_books.setText(str(issued_books))
-        self.lbl_overdue_books.setText(str(overdue_books))
+        # The labels are filled by refresh_dashboard on a query worker.
         self.charts_layout = QHBoxLayout()
         layout.addLayout(self.charts_layout)
+        months = [date(2000, i, 1).strftime("%b") for i in range(1, 13)]
+        self.issued_chart = BarChart("Books Issued per Month", months, ylabel="No. of Books")
+        self.availability_chart = PieChart("Book Availability", ["Issued", "Available"],
+                                           colors=["#ff6b6b", "#51cf66"])
+        self.charts_layout.addWidget(self.issued_chart)
+        self.charts_layout.addWidget(self.availability_chart)
 
        
         self.new_arrivals_title = QLabel("<h2>🆕 New Arrivals</h2>")
@@ -703,44 +798,29 @@ class MainWindow(QMainWindow):
         layout.addStretch()
         return w
 
+    def show_dashboard_stats(self, stats):
+        self.lbl_total_books.setText(str(stats["total_books"]))
+        self.lbl_total_students.setText(str(stats["total_students"]))
+        self.lbl_issued_books.setText(str(stats["issued_books"]))
+        self.lbl_overdue_books.setText(str(stats["overdue_books"]))
+
     def refresh_dashboard(self):
-        c = self.dbm.conn.cursor()
-        today = date.today()
-        month_str = today.strftime("%m")
-        year_str = today.strftime("%Y")
-        c.execute("SELECT IFNULL(SUM(quantity), 0) FROM books")
-        self.lbl_total_books.setText(str(c.fetchone()[0]))
-
-        c.execute("SELECT COUNT(*) FROM students")
-        self.lbl_total_students.setText(str(c.fetchone()[0]))
-
-        c.execute("SELECT COUNT(*) FROM issued_books WHERE status='Issued'")
-        self.lbl_issued_books.setText(str(c.fetchone()[0]))
-
-        c.execute("""
-        SELECT COUNT(*) FROM issued_books
-        WHERE status='Issued' AND expected_return_date < ?
-    """, (today.strftime("%Y-%m-%d"),))
-        self.lbl_overdue_books.setText(str(c.fetchone()[0]))
-        fee_per_day = self.dbm.get_overdue_fee() or 0
-        c.execute("""
-        SELECT expected_return_date, actual_return_date
-        FROM issued_books
-        WHERE status='Returned' AND actual_return_date IS NOT NULL
-    """)
-        records = c.fetchall()
-        month_income = 0
-        year_income = 0
-        for r in records:
-            due = datetime.strptime(r[0], "%Y-%m-%d").date()
-            ret = datetime.strptime(r[1], "%Y-%m-%d").date()
-            overdue_days = (ret - due).days
-            if overdue_days > 0:
-                fee = overdue_days * fee_per_day
-                if ret.strftime("%Y") == year_str:
-                    year_income += fee
-                    if ret.strftime("%m") == month_str:
-                        month_income += fee
+        self.queries.submit("dashboard", self.load_dashboard, self.show_dashboard)
+
+    def load_dashboard(self):
+        """Every dashboard query, run on a query worker."""
+        return {
+            "stats": self.dbm.get_dashboard_stats(),
+            "income": self.dbm.get_fee_income(),
+            "overdue": self.dbm.get_overdue(),
+            "new_books": self.dbm.list_new_arrivals(),
+            "issued_series": self.dbm.get_circulation_series(date.today().year)[0],
+        }
+
+    def show_dashboard(self, data):
+        stats = data["stats"]
+        self.show_dashboard_stats(stats)
+        month_income, year_income = data["income"]
         self.lbl_month_income.setText(f"₹{month_income:.2f}")
         self.lbl_year_income.setText(f"₹{year_income:.2f}")
 
@@ -749,20 +829,12 @@ class MainWindow(QMainWindow):
             if widget:
                 widget.setParent(None)
 
-        c.execute("""
-        SELECT s.name, b.title, ib.expected_return_date
-        FROM issued_books ib
-        JOIN students s ON ib.student_id=s.student_id
-        JOIN books b ON ib.book_id=b.book_id
-        WHERE ib.status='Issued' AND ib.expected_return_date < ?
-        ORDER BY ib.expected_return_date ASC
-    """, (today.strftime("%Y-%m-%d"),))
-        rows = c.fetchall()
+        rows = data["overdue"]
         if rows:
             self.overdue_title.setVisible(True)
             self.overdue_scroll.setVisible(True)
             for s in rows:
-                self.overdue_layout.addWidget(QLabel(f"🔸 <b>{s[0]}</b> - {s[1]} (Due: {s[2]})"))
+                self.overdue_layout.addWidget(QLabel(f"🔸 <b>{s['name']}</b> - {s['title']} (Due: {s['expected_return_date']})"))
         else:
             self.overdue_title.setVisible(False)
             self.overdue_scroll.setVisible(False)
@@ -771,12 +843,7 @@ class MainWindow(QMainWindow):
             if widget:
                 widget.setParent(None)
 
-        c.execute("""
-        SELECT title, author, added_date FROM books
-        ORDER BY added_date DESC
-        LIMIT 10
-    """)
-        new_books = c.fetchall()
+        new_books = data["new_books"]
         if new_books:
             self.new_arrivals_title.setVisible(True)
             self.new_arrivals_scroll.setVisible(True)
@@ -785,88 +852,15 @@ class MainWindow(QMainWindow):
         else:
             self.new_arrivals_title.setVisible(False)
             self.new_arrivals_scroll.setVisible(False)
-        for i in reversed(range(self.charts_layout.count())):
-            widget = self.charts_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        for i in reversed(range(self.charts_layout.count())):
-            widget = self.charts_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        def make_dynamic_canvas(title=""):
-            fig = Figure(figsize=(4, 3), dpi=100)
-            ax = fig.add_subplot(111)
-            fig.subplots_adjust(left=0.15, right=0.95, top=0.85, bottom=0.2)
-            canvas = FigureCanvas(fig)
-
-            def on_resize(event=None):
-                w = canvas.width() / canvas.logicalDpiX()
-                h = canvas.height() / canvas.logicalDpiY()
-                fig.set_size_inches(w, h)
-                scale = max(0.5, min(1.5, w / 4)) 
-                for label in (ax.get_xticklabels() + ax.get_yticklabels()):
-                    label.set_fontsize(8 * scale)
-                ax.title.set_fontsize(12 * scale)
-                ax.xaxis.label.set_fontsize(9 * scale)
-                ax.yaxis.label.set_fontsize(9 * scale)
-                fig.tight_layout()
-                canvas.draw_idle()
-
-            canvas.resizeEvent = on_resize  
-            return fig, ax, canvas
-
-        fig1, ax1, canvas1 = make_dynamic_canvas("Books Issued per Month")
-        months = [date(today.year, i, 1).strftime("%b") for i in range(1, 13)]
-        issued_data = []
-        for i in range(1, 13):
-            m = f"{i}"
-            c.execute("""
-                SELECT COUNT(*) FROM issued_books
-                WHERE strftime('%m', issue_date)=? AND strftime('%Y', issue_date)=?
-            """, (m, str(today.year)))
-            issued_data.append(c.fetchone()[0])
-        ax1.bar(months, issued_data, color="#007bff")
-        ax1.set_ylabel("No. of Books")
-        ax1.set_title("Books Issued per Month")
-        ax1.yaxis.set_major_locator(MaxNLocator(integer=True))
-        self.charts_layout.addWidget(canvas1)
-
-        fig2, ax2, canvas2 = make_dynamic_canvas("Book Availability")
-
-        issued_count = int(self.lbl_issued_books.text())
-        total_books = int(self.lbl_total_books.text())
-        available_books = total_books - issued_count
-        values = [issued_count, available_books]
-        labels = ["Issued", "Available"]
-
-        if total_books > 0 and sum(values) > 0:
-            ax2.pie(
-                values,
-                labels=labels,
-                autopct="%1.1f%%",
-                colors=["#ff6b6b", "#51cf66"],
-                startangle=90
-            )
-        else:
-            ax2.text(0, 0, "No Data", ha="center", va="center", fontsize=12)
-            ax2.axis("equal")
-
-        ax2.set_title("Book Availability")
-        self.charts_layout.addWidget(canvas2)
-
-
+        self.issued_chart.set_data(data["issued_series"])
 
+        issued_count = stats["issued_books"]
+        total_books = stats["total_books"]
+        self.availability_chart.set_data([issued_count, max(total_books - issued_count, 0)])
 
     def check_overdue(self):
-        overdue = self.dbm.get_overdue()
-        if overdue:
-            msgs = []
-            for item in overdue[:5]:
-                msgs.append(f"{item[2]} — {item[4]} (overdue by {item[7]} days)")
-            txt = "\n".join(msgs)
-        self.refresh_dashboard()
+        if self.stack.currentIndex() == 0:
+            self.refresh_if_changed(0)
 
     # -------------------------
     # Books Page
@@ -881,49 +875,46 @@ class MainWindow(QMainWindow):
         self.book_search = QLineEdit()
         self.book_search.setPlaceholderText("Search by title, author, category, or barcode")
         self.book_search.returnPressed.connect(self.refresh_books_table)
+        self.debounce_search(self.book_search, self.refresh_books_table)
         self.book_search_btn = QPushButton("Search")
         self.book_search_btn.clicked.connect(self.refresh_books_table)
         self.add_book_btn = QPushButton("Add Book")
         self.edit_book_btn = QPushButton("Edit Selected")
         self.delete_book_btn = QPushButton("Delete Selected")
         self.assign_barcode_btn = QPushButton("Assign Barcode")
+        self.import_books_btn = QPushButton("Import CSV")
         action_layout.addWidget(self.book_search)
         action_layout.addWidget(self.book_search_btn)
         action_layout.addWidget(self.add_book_btn)
         action_layout.addWidget(self.edit_book_btn)
         action_layout.addWidget(self.delete_book_btn)
         action_layout.addWidget(self.assign_barcode_btn)
+        action_layout.addWidget(self.import_books_btn)
         layout.addLayout(action_layout)
-        self.books_table = QTableWidget(0, 6)
-        self.books_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.books_table.setHorizontalHeaderLabels(["ID", "Title", "Author", "Category", "Quantity", "Barcode"])
-        self.books_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.books_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.books_model = PagedTableModel(
+            [("ID", "book_id"), ("Title", "title"), ("Author", "author"), ("Category", "category"),
+             ("Quantity", "quantity"), ("Barcode", "barcode")],
+            self.search_cache.pager("books", lambda search, after: self.dbm.list_books_page(search, after),
+                                    self.dbm.get_books_by_ids, "book_id"),
+            count=self.search_cache.counter("books", self.dbm.count_books), service=self.queries)
+        self.books_table = make_table_view(self.books_model)
         layout.addWidget(self.books_table)
+        self.books_status = QLabel()
+        layout.addWidget(self.books_status)
+        self.bind_status(self.books_model, self.books_status)
         self.add_book_btn.clicked.connect(self.add_book)
         self.edit_book_btn.clicked.connect(self.edit_selected_book)
         self.delete_book_btn.clicked.connect(self.delete_selected_book)
         self.assign_barcode_btn.clicked.connect(self.assign_barcode_to_book)
-        self.books_table.itemSelectionChanged.connect(self.update_books_buttons_state)
+        self.import_books_btn.clicked.connect(lambda: self.import_csv("books"))
+        self.books_table.selectionModel().selectionChanged.connect(self.update_books_buttons_state)
         return w
 
     def refresh_books_table(self):
-        q = self.book_search.text().strip()
-        rows = self.dbm.list_books(q if q else None)
-        self.books_table.setSortingEnabled(False)
-        self.books_table.setRowCount(0)
-        for r in rows:
-            row_idx = self.books_table.rowCount()
-            self.books_table.insertRow(row_idx)
-            self.books_table.setItem(row_idx, 0, QTableWidgetItem(str(r["book_id"])))
-            self.books_table.setItem(row_idx, 1, QTableWidgetItem(r["title"]))
-            self.books_table.setItem(row_idx, 2, QTableWidgetItem(r["author"] or ""))
-            self.books_table.setItem(row_idx, 3, QTableWidgetItem(r["category"] or ""))
-            self.books_table.setItem(row_idx, 4, QTableWidgetItem(str(r["quantity"])))
-            self.books_table.setItem(row_idx, 5, QTableWidgetItem(r["barcode"] or ""))
-        self.books_table.setSortingEnabled(True)
+        self.books_model.reset(self.search_query(self.book_search))
+
     def update_books_buttons_state(self):
-        selected_rows = len(set(item.row() for item in self.books_table.selectedItems()))
+        selected_rows = len(self.books_table.selectionModel().selectedRows())
         single_selection = (selected_rows == 1)
         self.edit_book_btn.setEnabled(single_selection)
         self.assign_barcode_btn.setEnabled(single_selection)
@@ -940,20 +931,12 @@ class MainWindow(QMainWindow):
 
 
     def get_selected_book_id(self):
-        sel = self.books_table.selectedItems()
-        if not sel:
-            return None
-        book_id = int(sel[0].text())
-        return book_id
+        ids = selected_ids(self.books_table)
+        return ids[0] if ids else None
+
     def get_selected_book_ids(self):
         """Return a list of all selected book IDs from the table."""
-        selected_rows = set(item.row() for item in self.books_table.selectedItems())
-        book_ids = []
-        for row in selected_rows:
-            item = self.books_table.item(row, 0)  # ID is column 0
-            if item and item.text().strip().isdigit():
-                book_ids.append(int(item.text()))
-        return book_ids
+        return selected_ids(self.books_table)
 
     def add_book(self):
         dlg = AddEditBookDialog(self.dbm, parent=self)
@@ -997,14 +980,13 @@ class MainWindow(QMainWindow):
         confirm = QMessageBox.question(self, "Confirm Delete", msg, QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if confirm != QMessageBox.StandardButton.Yes:
             return
-        success_count = 0
-        error_messages = []
-        for bid in book_ids:
-            try:
-                self.dbm.delete_book(bid)
-                success_count += 1
-            except Exception as e:
-                error_messages.append(f"Book ID {bid}: {e}")
+        try:
+            deleted, errors = self.dbm.delete_books(book_ids)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        success_count = len(deleted)
+        error_messages = [f"Book ID {bid}: {msg}" for bid, msg in errors.items()]
         if success_count > 0:
             QMessageBox.information(self, "Deleted", f"Successfully deleted {success_count} book(s).")
             self.refresh_books_table()
@@ -1043,49 +1025,49 @@ class MainWindow(QMainWindow):
         self.student_search = QLineEdit()
         self.student_search.setPlaceholderText("Search by name, class or contact")
         self.student_search.returnPressed.connect(self.refresh_students_table)
+        self.debounce_search(self.student_search, self.refresh_students_table)
         self.student_search_btn = QPushButton("Search")
         self.student_search_btn.clicked.connect(self.refresh_students_table)
         self.add_student_btn = QPushButton("Add Student")
         self.edit_student_btn = QPushButton("Edit Selected")
         self.delete_student_btn = QPushButton("Delete Selected")
+        self.import_students_btn = QPushButton("Import CSV")
 
         action_layout.addWidget(self.student_search)
         action_layout.addWidget(self.student_search_btn)
         action_layout.addWidget(self.add_student_btn)
         action_layout.addWidget(self.edit_student_btn)
         action_layout.addWidget(self.delete_student_btn)
+        action_layout.addWidget(self.import_students_btn)
         layout.addLayout(action_layout)
 
-        self.students_table = QTableWidget(0, 4)
-        self.students_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.students_table.setHorizontalHeaderLabels(["ID", "Name", "Class", "Contact"])
-        self.students_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.students_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.students_model = PagedTableModel(
+            [("ID", "student_id"), ("Name", "name"), ("Class", "class"), ("Contact", "contact"),
+             ("ID Card", "card_barcode")],
+            self.search_cache.pager("students",
+                                    lambda search, after: self.dbm.list_students_page(search, after),
+                                    self.dbm.get_students_by_ids, "student_id"),
+            count=self.search_cache.counter("students", self.dbm.count_students), service=self.queries)
+        self.students_table = make_table_view(self.students_model)
         layout.addWidget(self.students_table)
-        self.students_table.itemSelectionChanged.connect(self.update_students_buttons_state)
+        self.students_status = QLabel()
+        layout.addWidget(self.students_status)
+        self.bind_status(self.students_model, self.students_status)
+        self.students_table.selectionModel().selectionChanged.connect(self.update_students_buttons_state)
         self.edit_student_btn.setEnabled(False)
         self.delete_student_btn.setEnabled(False)
         self.add_student_btn.clicked.connect(self.add_student)
         self.edit_student_btn.clicked.connect(self.edit_selected_student)
         self.delete_student_btn.clicked.connect(self.delete_selected_student)
+        self.import_students_btn.clicked.connect(lambda: self.import_csv("students"))
 
         return w
 
     def refresh_students_table(self):
-        q = self.student_search.text().strip()
-        rows = self.dbm.list_students(q if q else None)
-        self.students_table.setRowCount(0)
-        self.students_table.setSortingEnabled(False)
-        for r in rows:
-            row_idx = self.students_table.rowCount()
-            self.students_table.insertRow(row_idx)
-            self.students_table.setItem(row_idx, 0, QTableWidgetItem(str(r["student_id"])))
-            self.students_table.setItem(row_idx, 1, QTableWidgetItem(r["name"]))
-            self.students_table.setItem(row_idx, 2, QTableWidgetItem(r["class"] or ""))
-            self.students_table.setItem(row_idx, 3, QTableWidgetItem(r["contact"] or ""))
-        self.students_table.setSortingEnabled(True)
+        self.students_model.reset(self.search_query(self.student_search))
+
     def update_students_buttons_state(self):
-        selected_rows = len(set(item.row() for item in self.students_table.selectedItems()))
+        selected_rows = len(self.students_table.selectionModel().selectedRows())
         single_selection = (selected_rows == 1)
         self.edit_student_btn.setEnabled(single_selection)
         if selected_rows == 0:
@@ -1098,16 +1080,7 @@ class MainWindow(QMainWindow):
             self.delete_student_btn.setEnabled(True)
             self.delete_student_btn.setText(f"Delete {selected_rows} Students")
     def get_selected_student_ids(self):
-        sel = self.students_table.selectedItems()
-        if not sel:
-            return []
-        rows = sorted(set(item.row() for item in sel))
-        ids = []
-        for r in rows:
-            item = self.students_table.item(r, 0)
-            if item and item.text().isdigit():
-                ids.append(int(item.text()))
-        return ids
+        return selected_ids(self.students_table)
 
     def delete_selected_student(self):
         student_ids = self.get_selected_student_ids()
@@ -1136,14 +1109,13 @@ class MainWindow(QMainWindow):
         if confirm != QMessageBox.StandardButton.Yes:
             return
 
-        success_count = 0
-        errors = []
-        for sid in student_ids:
-            try:
-                self.dbm.delete_student(sid)
-                success_count += 1
-            except Exception as e:
-                errors.append(f"Student ID {sid}: {e}")
+        try:
+            deleted, failed = self.dbm.delete_students(student_ids)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        success_count = len(deleted)
+        errors = [f"Student ID {sid}: {msg}" for sid, msg in failed.items()]
 
         if success_count > 0:
             QMessageBox.information(self, "Deleted", f"Successfully deleted {success_count} student(s).")
@@ -1152,11 +1124,8 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Partial Errors", "\n".join(errors))
 
     def get_selected_student_id(self):
-        sel = self.students_table.selectedItems()
-        if not sel:
-            return None
-        student_id = int(sel[0].text())
-        return student_id
+        ids = selected_ids(self.students_table)
+        return ids[0] if ids else None
 
     def add_student(self):
         dlg = AddEditStudentDialog(self.dbm, parent=self)
@@ -1196,8 +1165,12 @@ class MainWindow(QMainWindow):
         form_group = QGroupBox("Issue details")
         form_layout = QFormLayout()
 
-        self.issue_student_combo = QComboBox()
-        self.issue_book_combo = QComboBox()
+        self.issue_student_picker = RecordPicker(
+            self.dbm.pick_students, self.dbm.get_student, lambda s: s["student_id"], student_label,
+            placeholder="Type a name, class or student ID...", service=self.queries)
+        self.issue_book_picker = RecordPicker(
+            self.dbm.pick_books, self.get_available_book, lambda b: b["book_id"], book_label,
+            placeholder="Type a title, author, barcode or book ID...", service=self.queries)
         self.issue_issue_date = QDateEdit()
         self.issue_issue_date.setCalendarPopup(True)
         self.issue_issue_date.setDate(QDate.currentDate())
@@ -1205,8 +1178,17 @@ class MainWindow(QMainWindow):
         self.issue_return_date.setCalendarPopup(True)
         self.issue_return_date.setDate(QDate.currentDate().addDays(7))
 
-        form_layout.addRow("Student:", self.issue_student_combo)
-        form_layout.addRow("Book:", self.issue_book_combo)
+        self.issue_scan_input = QLineEdit()
+        self.issue_scan_input.setPlaceholderText("Scan the student's ID card, then each book")
+        self.issue_basket = QListWidget()
+        self.issue_basket.setMaximumHeight(110)
+        self.issue_scan_status = QLabel()
+
+        form_layout.addRow("Scan:", self.issue_scan_input)
+        form_layout.addRow("", self.issue_scan_status)
+        form_layout.addRow("Student:", self.issue_student_picker)
+        form_layout.addRow("Book:", self.issue_book_picker)
+        form_layout.addRow("Scanned books:", self.issue_basket)
         form_layout.addRow("Issue Date:", self.issue_issue_date)
         form_layout.addRow("Expected Return:", self.issue_return_date)
 
@@ -1217,66 +1199,86 @@ class MainWindow(QMainWindow):
         self.issue_btn = QPushButton("Issue Book")
         self.issue_refresh_btn = QPushButton("Refresh lists")
         self.issue_scan_btn = QPushButton("Scan Book Barcode")
+        self.issue_session_btn = QPushButton("Scan Session")
+        self.issue_clear_btn = QPushButton("Clear Scanned")
         btn_layout.addWidget(self.issue_btn)
+        btn_layout.addWidget(self.issue_clear_btn)
         btn_layout.addWidget(self.issue_refresh_btn)
         btn_layout.addWidget(self.issue_scan_btn)
+        btn_layout.addWidget(self.issue_session_btn)
         layout.addLayout(btn_layout)
 
         layout.addWidget(QLabel("<b>Currently Issued Books</b>"))
-        self.issued_table = QTableWidget(0, 6)
-        self.issued_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.issued_table.setHorizontalHeaderLabels(["Issue ID", "Book", "Student", "Issue Date", "Expected Return", "Status"])
-        self.issued_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.issued_model = PagedTableModel(
+            [("Issue ID", "issue_id"), ("Book", "title"), ("Student", "student_name"),
+             ("Issue Date", "issue_date"), ("Expected Return", "expected_return_date"), ("Status", "status")],
+            lambda _, after: self.dbm.list_issued_page(after=after), service=self.queries)
+        self.issued_table = make_table_view(self.issued_model)
         layout.addWidget(self.issued_table)
         self.issue_btn.clicked.connect(self.issue_book)
         self.issue_refresh_btn.clicked.connect(self.refresh_issue_page)
         self.issue_scan_btn.clicked.connect(self.scan_barcode_for_issue)
+        self.issue_session_btn.clicked.connect(lambda: self.open_scan_session("issue"))
+        self.issue_clear_btn.clicked.connect(self.clear_issue_scans)
+        self.issue_scan_input.returnPressed.connect(self.on_issue_scan_input)
 
         return w
 
+    def on_issue_scan_input(self):
+        barcode = self.issue_scan_input.text().strip()
+        self.issue_scan_input.clear()
+        if barcode:
+            self.handle_issue_scan(barcode)
+
+    def clear_issue_scans(self):
+        self.issue_basket.clear()
+        self.issue_scan_status.clear()
+
+    def get_available_book(self, book_id):
+        book = self.dbm.get_book(book_id)
+        return book if book and book["quantity"] > 0 else None
+
     def refresh_issue_page(self):
-        self.issue_student_combo.clear()
-        students = self.dbm.list_students()
-        self.issued_table.setSortingEnabled(False)
-        for s in students:
-            self.issue_student_combo.addItem(f"{s['name']} ({s['class']})", s["student_id"])
-        self.issue_book_combo.clear()
-        books = self.dbm.list_books()
-        for b in books:
-            if int(b["quantity"]) > 0:
-                self.issue_book_combo.addItem(f"{b['title']} by {b['author'] or 'Unknown'}  [{b['quantity']} copies]", b["book_id"])
-        rows = self.dbm.list_issued()
-        self.issued_table.setRowCount(0)
-        for r in rows:
-            idx = self.issued_table.rowCount()
-            self.issued_table.insertRow(idx)
-            self.issued_table.setItem(idx, 0, QTableWidgetItem(str(r["issue_id"])))
-            self.issued_table.setItem(idx, 1, QTableWidgetItem(r["title"]))
-            self.issued_table.setItem(idx, 2, QTableWidgetItem(r["student_name"]))
-            self.issued_table.setItem(idx, 3, QTableWidgetItem(r["issue_date"]))
-            self.issued_table.setItem(idx, 4, QTableWidgetItem(r["expected_return_date"]))
-            self.issued_table.setItem(idx, 5, QTableWidgetItem(r["status"]))
-        self.issued_table.setSortingEnabled(True)
+        # Only the picked records are reloaded; the pickers query matches as the user types.
+        for picker in (self.issue_student_picker, self.issue_book_picker):
+            if picker.current_id() is not None and not picker.select_id(picker.current_id()):
+                picker.clear_selection()
+        self.issued_model.reset()
+
     def issue_book(self):
-        sid_idx = self.issue_student_combo.currentIndex()
-        bid_idx = self.issue_book_combo.currentIndex()
-        if sid_idx < 0 or bid_idx < 0:
+        """Issue the scanned books plus the picked book to the student, in one transaction."""
+        student_id = self.issue_student_picker.current_id()
+        book_ids = self.scanned_issue_books()
+        if self.issue_book_picker.current_id() is not None:
+            book_ids.append(self.issue_book_picker.current_id())
+        if student_id is None or not book_ids:
             QMessageBox.warning(self, "Selection missing", "Choose a student and a book.")
             return
-        student_id = self.issue_student_combo.currentData()
-        book_id = self.issue_book_combo.currentData()
         issue_date = self.issue_issue_date.date().toPyDate()
         expected = self.issue_return_date.date().toPyDate()
         if expected < issue_date:
             QMessageBox.warning(self, "Invalid date", "Expected return date cannot be before issue date.")
             return
         try:
-            self.dbm.issue_book(book_id, student_id, issue_date.strftime("%Y-%m-%d"), expected.strftime("%Y-%m-%d"))
-            QMessageBox.information(self, "Issued", "Book issued successfully.")
-            self.refresh_issue_page()
-            self.refresh_books_table()
+            results = self.dbm.issue_books(student_id, book_ids, issue_date.strftime("%Y-%m-%d"),
+                                           expected.strftime("%Y-%m-%d"))
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+            return
+        issued = [r for r in results if not isinstance(r, str)]
+        failed = [(bid, r) for bid, r in zip(book_ids, results) if isinstance(r, str)]
+        if failed:
+            titles = {b["book_id"]: b["title"] for b in self.dbm.get_books_by_ids(list({bid for bid, _ in failed}))}
+            details = "\n".join(f"{titles.get(bid, bid)}: {msg}" for bid, msg in failed)
+            QMessageBox.warning(self, "Issued with errors",
+                                f"{len(issued)} book(s) issued.\n\nNot issued:\n{details}")
+        elif len(issued) == 1:
+            QMessageBox.information(self, "Issued", "Book issued successfully.")
+        else:
+            QMessageBox.information(self, "Issued", f"{len(issued)} books issued successfully.")
+        self.issue_book_picker.clear_selection()
+        self.clear_issue_scans()
+        self.refresh_issue_page()
 
     # -------------------------
     # Return Page
@@ -1291,54 +1293,49 @@ class MainWindow(QMainWindow):
         self.return_search = QLineEdit()
         self.return_search.setPlaceholderText("Search issued by book title, student name, or barcode")
         self.return_search.returnPressed.connect(self.refresh_return_page)
+        self.debounce_search(self.return_search, self.refresh_return_page)
         self.return_search_btn = QPushButton("Search")
         self.return_search_btn.clicked.connect(self.refresh_return_page)
         self.return_btn = QPushButton("Mark as Returned")
         self.return_scan_btn = QPushButton("Scan Book Barcode")
+        self.return_session_btn = QPushButton("Scan Session")
 
         action_layout.addWidget(self.return_search)
         action_layout.addWidget(self.return_search_btn)
         action_layout.addWidget(self.return_btn)
         action_layout.addWidget(self.return_scan_btn)
+        action_layout.addWidget(self.return_session_btn)
         layout.addLayout(action_layout)
 
-        self.return_table = QTableWidget(0, 7)
-        self.return_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.return_table.setHorizontalHeaderLabels(["Issue ID", "Book", "Student", "Issue Date", "Expected Return", "Status", "Overdue Days"])
-        self.return_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.return_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.return_model = PagedTableModel(
+            [("Issue ID", "issue_id"), ("Book", "title"), ("Student", "student_name"),
+             ("Issue Date", "issue_date"), ("Expected Return", "expected_return_date"), ("Status", "status"),
+             ("Overdue Days", "overdue_days")],
+            self.search_cache.pager("issued", lambda search, after: self.dbm.list_issued_page(True, search, after),
+                                    self.dbm.get_issues_by_ids, "issue_id"),
+            count=self.search_cache.counter("issued", lambda search: self.dbm.count_issued(True, search)),
+            service=self.queries)
+        self.return_table = make_table_view(self.return_model)
         layout.addWidget(self.return_table)
+        self.return_status = QLabel()
+        layout.addWidget(self.return_status)
+        self.bind_status(self.return_model, self.return_status)
         self.return_btn.clicked.connect(self.mark_returned)
         self.return_scan_btn.clicked.connect(self.scan_barcode_for_return)
-        self.return_table.itemSelectionChanged.connect(self.update_return_buttons_state)
+        self.return_session_btn.clicked.connect(lambda: self.open_scan_session("return"))
+        self.return_table.selectionModel().selectionChanged.connect(self.update_return_buttons_state)
         self.return_btn.setEnabled(False) 
         return w
 
     def refresh_return_page(self):
-        q = self.return_search.text().strip()
-        rows = self.dbm.list_issued(search=q if q else None)
-        self.return_table.setRowCount(0)
-        self.return_table.setSortingEnabled(False)
-        for r in rows:
-            idx = self.return_table.rowCount()
-            self.return_table.insertRow(idx)
-            self.return_table.setItem(idx, 0, QTableWidgetItem(str(r["issue_id"])))
-            self.return_table.setItem(idx, 1, QTableWidgetItem(r["title"]))
-            self.return_table.setItem(idx, 2, QTableWidgetItem(r["student_name"]))
-            self.return_table.setItem(idx, 3, QTableWidgetItem(r["issue_date"]))
-            self.return_table.setItem(idx, 4, QTableWidgetItem(r["expected_return_date"]))
-            self.return_table.setItem(idx, 5, QTableWidgetItem(r["status"]))
-            expected = datetime.strptime(r["expected_return_date"], "%Y-%m-%d").date()
-            overdue_days = (date.today() - expected).days
-            self.return_table.setItem(idx, 6, QTableWidgetItem(str(overdue_days if overdue_days > 0 else 0)))
-        self.return_table.setSortingEnabled(True)
+        self.return_model.reset(self.search_query(self.return_search))
+
     def get_selected_issue_id(self):
-        sel = self.return_table.selectedItems()
-        if not sel:
-            return None
-        return int(sel[0].text())
+        ids = selected_ids(self.return_table)
+        return ids[0] if ids else None
+
     def update_return_buttons_state(self):
-        selected_count = len(set(item.row() for item in self.return_table.selectedItems()))
+        selected_count = len(self.return_table.selectionModel().selectedRows())
         self.return_btn.setEnabled(selected_count > 0)
         if selected_count == 0:
             self.return_btn.setText("Mark as Returned")
@@ -1347,16 +1344,7 @@ class MainWindow(QMainWindow):
         else:
             self.return_btn.setText(f"Mark {selected_count} as Returned")
     def get_selected_issue_ids(self):
-        sel = self.return_table.selectedItems()
-        if not sel:
-            return []
-        rows = sorted(set(item.row() for item in sel))
-        ids = []
-        for r in rows:
-            item = self.return_table.item(r, 0)
-            if item and item.text().isdigit():
-                ids.append(int(item.text()))
-        return ids
+        return selected_ids(self.return_table)
 
     def mark_returned(self):
         issue_ids = self.get_selected_issue_ids()
@@ -1381,22 +1369,18 @@ class MainWindow(QMainWindow):
         if confirm != QMessageBox.StandardButton.Yes:
             return
 
-        success_count = 0
-        errors = []
-
         actual = date.today().strftime("%Y-%m-%d")
-        for iid in issue_ids:
-            try:
-                self.dbm.return_book(iid, actual)
-                success_count += 1
-            except Exception as e:
-                errors.append(f"Issue ID {iid}: {e}")
+        try:
+            returned, failed = self.dbm.return_books(issue_ids, actual)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        success_count = len(returned)
+        errors = [f"Issue ID {iid}: {msg}" for iid, msg in failed.items()]
 
         if success_count > 0:
             QMessageBox.information(self, "Returned", f"{success_count} book(s) marked as returned.")
             self.refresh_return_page()
-            self.refresh_books_table()
-            self.refresh_dashboard()
         if errors:
             QMessageBox.warning(self, "Partial Errors", "\n".join(errors))
 
@@ -1415,10 +1399,12 @@ class MainWindow(QMainWindow):
         self.btn_list_overdue = QPushButton("Overdue")
         self.btn_top_books = QPushButton("Top Books (by past issues)")
         self.btn_set_overdue_fee = QPushButton("Set Overdue Fee")
+        self.btn_export_report = QPushButton("Export Report CSV")
         btn_layout.addWidget(self.btn_list_all_issues)
         btn_layout.addWidget(self.btn_list_overdue)
         btn_layout.addWidget(self.btn_top_books)
         btn_layout.addWidget(self.btn_set_overdue_fee)
+        btn_layout.addWidget(self.btn_export_report)
         layout.addLayout(btn_layout)
         fee_layout = QHBoxLayout()
         fee_layout.addWidget(QLabel("Current Overdue Fee:"))
@@ -1427,50 +1413,33 @@ class MainWindow(QMainWindow):
         fee_layout.addStretch()
         layout.addLayout(fee_layout)
 
-        self.report_table = QTableWidget(0, 9) 
-        self.report_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers) 
-        self.report_table.setHorizontalHeaderLabels([
-            "Issue ID", "Book", "Student", "Issue Date", "Expected Return", 
-            "Returned On", "Status", "Overdue Days", "Fee"
-        ])
-        self.report_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        def fee_text(fee):
+            return f"₹{fee:.2f}"
+
+        # All Issues is paged in as the view scrolls; the short reports are shown as
+        # snapshots from reports.build_report. Export and the Drive sync always build a
+        # full snapshot of the current report.
+        self.report_all_model = PagedTableModel(
+            [("Issue ID", "issue_id"), ("Book", "title"), ("Student", "student_name"),
+             ("Issue Date", "issue_date"), ("Expected Return", "expected_return_date"),
+             ("Returned On", "actual_return_date"), ("Status", "status"), ("Overdue Days", "overdue_days"),
+             ("Fee", "fee", fee_text)],
+            lambda _, after: self.dbm.list_issued_page(only_issued=False, after=after),
+            count=lambda _: self.dbm.count_issued(only_issued=False), service=self.queries)
+        self.report_model = SnapshotTableModel({"Fee": fee_text})
+        self.report_table = make_table_view(self.report_all_model)
         layout.addWidget(self.report_table)
+        self.report_status = QLabel()
+        layout.addWidget(self.report_status)
+        self.bind_status(self.report_all_model, self.report_status)
         self.btn_list_all_issues.clicked.connect(self.report_all_issues)
         self.btn_list_overdue.clicked.connect(self.report_overdue)
         self.btn_top_books.clicked.connect(self.report_top_books)
         self.btn_set_overdue_fee.clicked.connect(self.set_overdue_fee)
+        self.btn_export_report.clicked.connect(self.export_report)
 
         return w
     
-    def update_fee_summary(self):
-        c = self.dbm.conn.cursor()
-        fee_per_day = self.dbm.get_overdue_fee() or 0
-        today = date.today()
-        month_str = today.strftime("%m")
-        year_str = today.strftime("%Y")
-        c.execute("""
-        SELECT expected_return_date, actual_return_date
-        FROM issued_books
-        WHERE status='Returned' AND actual_return_date IS NOT NULL
-    """)
-        rows = c.fetchall()
-
-        month_income = 0
-        year_income = 0
-        for r in rows:
-            due = datetime.strptime(r["expected_return_date"], "%Y-%m-%d").date()
-            ret = datetime.strptime(r["actual_return_date"], "%Y-%m-%d").date()
-            overdue_days = (ret - due).days
-            if overdue_days > 0:
-                fee = overdue_days * fee_per_day
-                if ret.strftime("%Y") == year_str:
-                    year_income += fee
-                    if ret.strftime("%m") == month_str:
-                        month_income += fee
-        self.lbl_month_income.setText(f"₹{month_income:.2f}")
-        self.lbl_year_income.setText(f"₹{year_income:.2f}")
-        
-
     def refresh_reports_page(self):
         
         self.update_overdue_fee_display()
@@ -1518,116 +1487,94 @@ class MainWindow(QMainWindow):
                     f"Overdue fee set to ₹{fee:.2f} per day per book."
                 )
 
-                if hasattr(self, 'current_report') and self.current_report == 'overdue':
-                    self.report_overdue()
+                if hasattr(self, 'current_report') and self.current_report != 'top':
+                    self.run_report(self.current_report)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to set fee: {str(e)}")
 
 
-    def calculate_overdue_fee(self, overdue_days):
-        """Calculate fee based on overdue days and current fee rate"""
-        if overdue_days <= 0:
-            return 0.0
-        
-        daily_fee = self.dbm.get_overdue_fee()
-        if daily_fee is None:
-            return 0.0
-        
-        return overdue_days * daily_fee
+    def run_report(self, name):
+        """Show report name; a newer report request supersedes one still loading."""
+        self.current_report = name
+        self.queries.cancel("report")
+        self.report_all_model.stop()
+        if name == 'all':
+            self.report_table.model().setSourceModel(self.report_all_model)
+            self.report_status.setText("")
+            self.report_all_model.reset()
+            return
+        self.report_status.setText("Loading...")
+        dbm = self.dbm
+        self.queries.submit("report", lambda: build_report(dbm, name), self.show_report,
+                            lambda err: self.report_status.setText(f"Query failed: {err}"))
+
+    def show_report(self, snapshot):
+        self.report_model.set_snapshot(snapshot)
+        self.report_table.model().setSourceModel(self.report_model)
+        self.report_status.setText(f"{snapshot.title}: {len(snapshot)} rows as of {snapshot.generated_at}")
 
     def report_all_issues(self):
-        self.current_report = 'all'
-        rows = self.dbm.list_all_issues()
-        self.report_table.setRowCount(0)
-        self.report_table.setSortingEnabled(False)
-        for r in rows:
-            idx = self.report_table.rowCount()
-            self.report_table.insertRow(idx)
-            self.report_table.setItem(idx, 0, QTableWidgetItem(str(r["issue_id"])))
-            self.report_table.setItem(idx, 1, QTableWidgetItem(r["title"]))
-            self.report_table.setItem(idx, 2, QTableWidgetItem(r["student_name"]))
-            self.report_table.setItem(idx, 3, QTableWidgetItem(r["issue_date"]))
-            self.report_table.setItem(idx, 4, QTableWidgetItem(r["expected_return_date"]))
-            self.report_table.setItem(idx, 5, QTableWidgetItem(r["actual_return_date"] or ""))
-            self.report_table.setItem(idx, 6, QTableWidgetItem(r["status"]))
-            
-            overdue = 0
-            fee = 0.0
-            if r["status"] == "Issued":
-                expected = datetime.strptime(r["expected_return_date"], "%Y-%m-%d").date()
-                overdue = (date.today() - expected).days
-                overdue = overdue if overdue > 0 else 0
-                fee = self.calculate_overdue_fee(overdue)
-            elif r["actual_return_date"]:
-                expected = datetime.strptime(r["expected_return_date"], "%Y-%m-%d").date()
-                actual = datetime.strptime(r["actual_return_date"], "%Y-%m-%d").date()
-                overdue = (actual - expected).days
-                overdue = overdue if overdue > 0 else 0
-                fee = self.calculate_overdue_fee(overdue)
-            
-            self.report_table.setItem(idx, 7, QTableWidgetItem(str(overdue)))
-            self.report_table.setItem(idx, 8, QTableWidgetItem(f"₹{fee:.2f}"))
-            self.report_table.setSortingEnabled(True)
+        self.run_report('all')
 
     def report_overdue(self):
-        self.current_report = 'overdue'
-        overdue = self.dbm.get_overdue()
-        self.report_table.setRowCount(0)
-        for item in overdue:
-            (issue_id, book_id, title, student_id, student_name, issue_date, expected_return_date, overdue_days) = item
-            idx = self.report_table.rowCount()
-            self.report_table.insertRow(idx)
-            self.report_table.setItem(idx, 0, QTableWidgetItem(str(issue_id)))
-            self.report_table.setItem(idx, 1, QTableWidgetItem(title))
-            self.report_table.setItem(idx, 2, QTableWidgetItem(student_name))
-            self.report_table.setItem(idx, 3, QTableWidgetItem(issue_date))
-            self.report_table.setItem(idx, 4, QTableWidgetItem(expected_return_date))
-            self.report_table.setItem(idx, 5, QTableWidgetItem(""))
-            self.report_table.setItem(idx, 6, QTableWidgetItem("Issued"))
-            self.report_table.setItem(idx, 7, QTableWidgetItem(str(overdue_days)))
-        
-            fee = self.calculate_overdue_fee(overdue_days)
-            self.report_table.setItem(idx, 8, QTableWidgetItem(f"₹{fee:.2f}"))
+        self.run_report('overdue')
 
     def report_top_books(self):
-        self.current_report = 'top'
-        c = self.dbm.conn.cursor()
-        c.execute("""
-            SELECT b.book_id, b.title, b.author, COUNT(ib.issue_id) AS times_issued
-            FROM books b
-            LEFT JOIN issued_books ib ON b.book_id = ib.book_id
-            GROUP BY b.book_id
-            ORDER BY times_issued DESC, b.title
-            LIMIT 20
-        """)
-        rows = c.fetchall()
-        self.report_table.setRowCount(0)
-        for r in rows:
-            idx = self.report_table.rowCount()
-            self.report_table.insertRow(idx)
-            self.report_table.setItem(idx, 0, QTableWidgetItem(str(r["book_id"])))
-            self.report_table.setItem(idx, 1, QTableWidgetItem(r["title"]))
-            self.report_table.setItem(idx, 2, QTableWidgetItem(r["author"] or ""))
-            self.report_table.setItem(idx, 3, QTableWidgetItem(str(r["times_issued"])))
-            for col in range(4, 9):
-                self.report_table.setItem(idx, col, QTableWidgetItem(""))
+        self.run_report('top')
+
+    def export_report(self):
+        """Write a full snapshot of the current report to CSV on a worker."""
+        name = getattr(self, "current_report", "all")
+        path, _ = QFileDialog.getSaveFileName(self, "Export Report", f"report_{name}.csv", "CSV Files (*.csv)")
+        if not path:
+            return
+        dbm = self.dbm
+
+        def export():
+            snapshot = build_report(dbm, name)
+            return snapshot.title, export_report_csv(snapshot, path)
+        self.queries.submit(
+            "report_export", export,
+            lambda done: QMessageBox.information(self, "Export Complete",
+                                                 f"{done[0]}: {done[1]} rows exported to {path}"),
+            lambda err: QMessageBox.critical(self, "Export Failed", f"Error: {err}"))
 
     # -------------------------
     # Sync in Drive for Backup
     # -------------------------
-    def on_sync_success(self, message):
-        QMessageBox.information(self, "Sync Complete", message)
-
     def on_sync_error(self, error):
-        QMessageBox.critical(self, "Sync Failed", f"Error: {error}")
+        self.sync_errors.append(error)
+
+    def on_sync_progress(self, table, done, total):
+        bar = self.sync_bars[table]
+        bar.setRange(0, max(total, 1))
+        bar.setValue(done)
+
+    def on_sync_part_done(self, part, error=""):
+        """A table (or the Reports page) finished; report once everything has."""
+        if part in self.sync_bars:
+            bar = self.sync_bars[part]
+            bar.setRange(0, 1)
+            bar.setValue(1)
+            if error:
+                bar.setFormat("Failed")
+        if error and error not in self.sync_errors:
+            self.sync_errors.append(error)
+        self.sync_pending.discard(part)
+        if not self.sync_pending:
+            self.on_sync_finished()
 
     def on_sync_finished(self):
         if hasattr(self, "wait_dialog") and self.wait_dialog.isVisible():
             self.wait_dialog.accept() 
-        self.refresh_dashboard()
+        if self.sync_errors:
+            QMessageBox.critical(self, "Sync Failed", "Error: " + "\n".join(self.sync_errors))
+        else:
+            QMessageBox.information(self, "Sync Complete", "Library data and Reports Page synced to Google Drive!")
+        self.refresh_if_changed(self.stack.currentIndex())
 
     def sync_to_drive(self):
-        if not os.path.exists(resource_path("token.pickle")):
+        if not is_google_logged_in():
             choice = QMessageBox.question(
                 self,
                 "Google Login Required",
@@ -1646,39 +1593,113 @@ class MainWindow(QMainWindow):
         self.wait_dialog = QDialog(self)
         self.wait_dialog.setWindowTitle("Syncing")
         self.wait_dialog.setModal(True)
-        self.wait_dialog.resize(300, 120)
+        self.wait_dialog.resize(360, 220)
         layout = QVBoxLayout()
         label = QLabel("Please wait... Syncing your data to Google Drive.")
         layout.addWidget(label)
-        self.progress = QProgressBar()
-        self.progress.setRange(0, 0)
-        layout.addWidget(self.progress)
+        bars_layout = QFormLayout()
+        self.sync_bars = {}
+        for part in SYNC_TABLES + ["reports"]:
+            bar = QProgressBar()
+            bar.setRange(0, 0)  # until the first chunk is sent
+            self.sync_bars[part] = bar
+            bars_layout.addRow(part.replace("_", " ").title() + ":", bar)
+        layout.addLayout(bars_layout)
         self.wait_dialog.setLayout(layout)
         self.wait_dialog.show()
 
+        self.sync_pending = set(self.sync_bars)
+        self.sync_errors = []
         self.threadpool = getattr(self, "threadpool", QThreadPool())
-        worker = DriveSyncWorker(self.dbm,main_window=self)
-        worker.signals.success.connect(self.on_sync_success)
+        self.threadpool.setMaxThreadCount(max(self.threadpool.maxThreadCount(), len(SYNC_TABLES) + 1))
+        worker = DriveSyncWorker(self.dbm, report=getattr(self, "current_report", "all"), pool=self.threadpool)
         worker.signals.error.connect(self.on_sync_error)
-        worker.signals.finished.connect(self.on_sync_finished)
+        worker.signals.finished.connect(lambda: self.on_sync_part_done("reports"))
+        worker.sync_signals.table_progress.connect(self.on_sync_progress)
+        worker.sync_signals.table_done.connect(self.on_sync_part_done)
         self.threadpool.start(worker)
 
+    # -------------------------
+    # Import CSV
+    # -------------------------
+    def import_csv(self, table):
+        columns = "title, author, category, quantity, barcode" if table == "books" else "name, class, contact"
+        path, _ = QFileDialog.getOpenFileName(self, f"Import {table.title()} CSV (columns: {columns})",
+                                              "", "CSV Files (*.csv)")
+        if not path:
+            return
+        self.import_dialog = QDialog(self)
+        self.import_dialog.setWindowTitle("Importing")
+        self.import_dialog.setModal(True)
+        self.import_dialog.resize(300, 140)
+        layout = QVBoxLayout()
+        self.import_label = QLabel(f"Importing {table}...")
+        layout.addWidget(self.import_label)
+        bar = QProgressBar()
+        bar.setRange(0, 0)
+        layout.addWidget(bar)
+        cancel_btn = QPushButton("Cancel")
+        layout.addWidget(cancel_btn)
+        self.import_dialog.setLayout(layout)
+
+        worker = ImportWorker(self.dbm.db_path, table, path)
+        cancel_btn.clicked.connect(lambda: setattr(worker, "cancel_requested", True))
+        worker.signals.progress.connect(
+            lambda done, bad: self.import_label.setText(f"{done} rows imported, {bad} rejected"))
+        worker.signals.success.connect(lambda msg: QMessageBox.information(self, "Import Complete", msg))
+        worker.signals.error.connect(lambda err: QMessageBox.critical(self, "Import Failed", f"Error: {err}"))
+        worker.signals.finished.connect(lambda: self.on_import_finished(table))
+        self.import_dialog.show()
+        self.threadpool = getattr(self, "threadpool", QThreadPool())
+        self.threadpool.start(worker)
+
+    def on_import_finished(self, table):
+        self.import_dialog.accept()
+        if table == "books":
+            self.refresh_books_table()
+        else:
+            self.refresh_students_table()
+
     # -------------------------
     # Export CSV
     # -------------------------
     def export_all_csv(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Export Books CSV", "books_export.csv", "CSV Files (*.csv)")
+        path, _ = QFileDialog.getSaveFileName(self, "Export All Tables", "library_export.zip", "Zip Archives (*.zip)")
         if not path:
             return
-        try:
-            self.dbm.export_table_csv("books", path)
-            QMessageBox.information(self, "Exported", f"Books exported to {path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Export error", str(e))
+        self.export_dialog = QDialog(self)
+        self.export_dialog.setWindowTitle("Exporting")
+        self.export_dialog.setModal(True)
+        self.export_dialog.resize(300, 140)
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Exporting books, students, issues and settings..."))
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 0)
+        layout.addWidget(self.export_progress)
+        cancel_btn = QPushButton("Cancel")
+        layout.addWidget(cancel_btn)
+        self.export_dialog.setLayout(layout)
+
+        worker = ExportWorker(self.dbm, path)
+        cancel_btn.clicked.connect(lambda: setattr(worker, "cancel_requested", True))
+        worker.signals.progress.connect(self.on_export_progress)
+        worker.signals.success.connect(lambda msg: QMessageBox.information(self, "Exported", msg))
+        worker.signals.error.connect(lambda err: QMessageBox.critical(self, "Export error", err))
+        worker.signals.finished.connect(self.export_dialog.accept)
+        self.export_dialog.show()
+        self.threadpool = getattr(self, "threadpool", QThreadPool())
+        self.threadpool.start(worker)
+
+    def on_export_progress(self, done, total):
+        self.export_progress.setRange(0, max(total, 1))
+        self.export_progress.setValue(done)
 
     def closeEvent(self, event):
+        if self.scan_session:
+            self.scan_session.flush()  # never drop queued scans, however the window closes
         if not QApplication.instance().closingDown():
             event.accept()
             return
+        self.queries.shutdown()
         self.dbm.close()
         event.accept()
\ No newline at end of file
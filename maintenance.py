@@ -0,0 +1,43 @@
+import argparse
+import sys
+
+from db_manager import DatabaseManager, DB_FILE
+
+
+def check_stats(dbm, repair):
+    drift = dbm.check_stats(repair=repair)
+    if not drift:
+        print("Dashboard counters are up to date.")
+        return 0
+    for name, (stored, actual) in drift.items():
+        print(f"{name}: stored {stored}, actual {actual}")
+    print("Counters repaired." if repair else "Run without --check-only to repair them.")
+    return 0 if repair else 1
+
+
+def rebuild_search_index(dbm):
+    dbm.rebuild_search_index()
+    print("Search index rebuilt.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Library database maintenance.")
+    parser.add_argument("--db", default=DB_FILE, help="Path to library.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("check-stats", help="recompute the dashboard counters and fix any drift")
+    stats.add_argument("--check-only", action="store_true", help="report drift without repairing it")
+    commands.add_parser("rebuild-search", help="re-read every book and student into the search index")
+    args = parser.parse_args(argv)
+
+    dbm = DatabaseManager(args.db)
+    try:
+        if args.command == "check-stats":
+            return check_stats(dbm, repair=not args.check_only)
+        return rebuild_search_index(dbm)
+    finally:
+        dbm.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
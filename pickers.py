@@ -0,0 +1,128 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QLineEdit, QCompleter
+
+PICKER_DEBOUNCE_MS = 150
+PICKER_LIMIT = 20
+ID_ROLE = Qt.ItemDataRole.UserRole
+
+
+def student_label(s):
+    return f"{s['name']} ({s['class']})"
+
+
+def book_label(b):
+    return f"{b['title']} by {b['author'] or 'Unknown'}  [{b['quantity']} copies]"
+
+
+class MatchListModel(QAbstractListModel):
+    """(id, label) pairs for a completer popup."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+
+    def set_items(self, items):
+        self.beginResetModel()
+        self.items = list(items)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item_id, label = self.items[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return label
+        if role == ID_ROLE:
+            return item_id
+        return None
+
+
+class RecordPicker(QLineEdit):
+    """Line edit with a type-ahead popup that queries the database as the user types.
+
+    search(text, limit) returns rows, get(id) returns one row or None, id_of(row) and
+    label(row) describe a row. Only the matches for the current text are ever loaded.
+    """
+    picked = pyqtSignal(object)  # id, or None when the selection is cleared
+
+    def __init__(self, search, get, id_of, label, placeholder="", service=None, parent=None):
+        super().__init__(parent)
+        self.search = search
+        self.get = get
+        self.id_of = id_of
+        self.label = label
+        self.service = service
+        self.current = None
+        self.setPlaceholderText(placeholder)
+        self.matches = MatchListModel(self)
+        self.completer = QCompleter(self.matches, self)
+        # The database already filtered the rows; the completer just shows them.
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setWidget(self)
+        self.completer.activated[QModelIndex].connect(self.on_activated)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(PICKER_DEBOUNCE_MS)
+        self.timer.timeout.connect(self.lookup)
+        self.textEdited.connect(self.on_edited)
+
+    def on_edited(self, text):
+        if self.current is not None:
+            self.current = None
+            self.picked.emit(None)
+        self.timer.start()
+
+    def lookup(self):
+        text = self.text().strip()
+        if not text:
+            self.matches.set_items([])
+            self.completer.popup().hide()
+            return
+        search = self.search
+        if self.service:
+            self.service.submit(self, lambda: search(text, PICKER_LIMIT), self.show_matches)
+        else:
+            self.show_matches(search(text, PICKER_LIMIT))
+
+    def show_matches(self, rows):
+        self.matches.set_items((self.id_of(r), self.label(r)) for r in rows)
+        if rows and self.hasFocus():
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def on_activated(self, index):
+        item_id = index.data(ID_ROLE)
+        row = self.get(item_id)
+        if row is not None:
+            self.set_row(row)
+
+    def set_row(self, row):
+        self.timer.stop()
+        self.current = self.id_of(row)
+        self.setText(self.label(row))
+        self.completer.popup().hide()
+        self.picked.emit(self.current)
+
+    def select_id(self, item_id):
+        """Select a record directly, e.g. from a scanned barcode; False if it is not pickable."""
+        row = self.get(item_id)
+        if row is None:
+            return False
+        self.set_row(row)
+        return True
+
+    def current_id(self):
+        return self.current
+
+    def clear_selection(self):
+        self.timer.stop()
+        if self.service:
+            self.service.cancel(self)
+        self.current = None
+        self.clear()
+        self.matches.set_items([])
+        self.picked.emit(None)
@@ -0,0 +1,107 @@
+import itertools
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+MAX_QUERY_THREADS = 3
+
+
+class QuerySignals(QObject):
+    done = pyqtSignal(object, int, object)   # view, request id, result
+    failed = pyqtSignal(object, int, str)    # view, request id, error
+
+
+class QueryWorker(QRunnable):
+    def __init__(self, dbm, view, request_id, fn, signals):
+        """Run fn() on a pool thread, reading through that thread's own connection."""
+        super().__init__()
+        self.dbm = dbm
+        self.view = view
+        self.request_id = request_id
+        self.fn = fn
+        self.signals = signals
+        self.cancelled = False
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def run(self):
+        if self.cancelled:
+            return
+        with self.lock:
+            self.conn = self.dbm.reader_connection()
+        try:
+            result = self.fn()
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(self.view, self.request_id, str(e))
+        else:
+            if not self.cancelled:
+                self.signals.done.emit(self.view, self.request_id, result)
+        finally:
+            with self.lock:
+                self.conn = None
+
+    def interrupt(self):
+        """Stop the statement in progress; the worker then exits without reporting."""
+        with self.lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+
+class QueryService(QObject):
+    """Runs DatabaseManager reads off the GUI thread, one live request per view.
+
+    submit(view, fn, on_result) runs fn() on a worker and calls on_result(result) on
+    the GUI thread. A newer request for the same view interrupts the older one and
+    any result it still produces is dropped.
+    """
+
+    def __init__(self, dbm, parent=None):
+        super().__init__(parent)
+        self.dbm = dbm
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_QUERY_THREADS)
+        self.signals = QuerySignals()
+        self.signals.done.connect(self._on_done)
+        self.signals.failed.connect(self._on_failed)
+        self.pending = {}
+        self.ids = itertools.count(1)
+
+    def submit(self, view, fn, on_result, on_error=None):
+        self.cancel(view)
+        request_id = next(self.ids)
+        worker = QueryWorker(self.dbm, view, request_id, fn, self.signals)
+        self.pending[view] = (request_id, worker, on_result, on_error)
+        self.pool.start(worker)
+        return request_id
+
+    def cancel(self, view):
+        entry = self.pending.pop(view, None)
+        if entry:
+            entry[1].interrupt()
+
+    def is_pending(self, view):
+        return view in self.pending
+
+    def shutdown(self):
+        for view in list(self.pending):
+            self.cancel(view)
+        self.pool.waitForDone()
+
+    def _take(self, view, request_id):
+        entry = self.pending.get(view)
+        if entry is None or entry[0] != request_id:
+            return None  # superseded or cancelled
+        del self.pending[view]
+        return entry
+
+    def _on_done(self, view, request_id, result):
+        entry = self._take(view, request_id)
+        if entry:
+            entry[2](result)
+
+    def _on_failed(self, view, request_id, error):
+        entry = self._take(view, request_id)
+        if entry and entry[3]:
+            entry[3](error)
@@ -0,0 +1,159 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+SLOW_QUERY_LOG = "slow_queries.log"
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000]
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and IN (?,?,...) lists so one statement shape is one histogram key."""
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return re.sub(r"\(\s*\?(\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+
+
+def params_shape(params, many=False):
+    """Describe parameters without logging their (possibly personal) values."""
+    if many:
+        first = params[0] if params else ()
+        return f"{len(params)} x {params_shape(first)}"
+    if isinstance(params, dict):
+        return "{" + ", ".join(sorted(params)) + "}"
+    return f"{len(params)} params"
+
+
+class QueryTracer:
+    """Collects per-statement timings and writes statements slower than slow_ms to a rotating log."""
+
+    def __init__(self, slow_ms=100, log_path=SLOW_QUERY_LOG, max_bytes=1_000_000, backup_count=3):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(f"library_tracker.sql.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding="utf-8")
+        self.handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.logger.addHandler(self.handler)
+
+    def record(self, sql, shape, rows, elapsed):
+        ms = elapsed * 1000
+        key = normalize_sql(sql)
+        with self.lock:
+            st = self.stats.get(key)
+            if st is None:
+                st = self.stats[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                                        "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+            st["count"] += 1
+            st["total_ms"] += ms
+            st["max_ms"] = max(st["max_ms"], ms)
+            st["rows"] += max(rows, 0)
+            bucket = next((i for i, b in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= b), len(HISTOGRAM_BUCKETS_MS))
+            st["buckets"][bucket] += 1
+        if ms >= self.slow_ms:
+            self.logger.info(f"{ms:.1f} ms | rows={rows} | params={shape} | {key}")
+
+    def report(self):
+        """Text table of every statement seen so far, slowest total time first."""
+        labels = [f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+        with self.lock:
+            items = sorted(self.stats.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+            lines = []
+            for sql, st in items:
+                hist = " ".join(f"{label}:{n}" for label, n in zip(labels, st["buckets"]) if n)
+                lines.append(f"{st['count']:>7} calls  {st['total_ms']:>10.1f} ms total  "
+                             f"{st['total_ms'] / st['count']:>8.2f} avg  {st['max_ms']:>8.1f} max  "
+                             f"{st['rows']:>9} rows  [{hist} ms]\n    {sql}")
+        return "\n".join(lines)
+
+    def dump(self):
+        """Write the histogram report into the slow-query log and return it."""
+        text = self.report()
+        self.logger.info("Query statistics\n" + text)
+        return text
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+
+class TracingCursor(sqlite3.Cursor):
+    """Cursor that times execute plus every fetch and reports one record per statement."""
+
+    _pending = None
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending and self.connection.tracer:
+            sql, shape, rows, elapsed = pending
+            self.connection.tracer.record(sql, shape, rows, elapsed)
+
+    def _run(self, method, sql, params, shape):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            self._pending = [sql, shape, 0, time.perf_counter() - start]
+            if self.description is None:
+                self._pending[2] = self.rowcount
+                self._finish()
+
+    def execute(self, sql, params=()):
+        return self._run(super().execute, sql, params, params_shape(params))
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        return self._run(super().executemany, sql, seq_of_params, params_shape(seq_of_params, many=True))
+
+    def _fetch(self, method, *args, limit=None):
+        start = time.perf_counter()
+        result = method(*args)
+        if self._pending:
+            self._pending[3] += time.perf_counter() - start
+            if result is None:
+                self._finish()
+            elif isinstance(result, list):
+                self._pending[2] += len(result)
+                if limit is None or len(result) < limit:
+                    self._finish()
+            else:
+                self._pending[2] += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        return self._fetch(super().fetchmany, size, limit=size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        try:
+            return self._fetch(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
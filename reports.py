@@ -0,0 +1,75 @@
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+
+from db_manager import DatabaseManager, _today
+
+REPORTS = ("all", "overdue", "top")
+TOP_BOOKS_LIMIT = 20
+
+LOAN_HEADERS = ("Issue ID", "Book", "Student", "Issue Date", "Expected Return",
+                "Returned On", "Status", "Overdue Days", "Fee")
+TOP_HEADERS = ("Book ID", "Book", "Author", "Times Issued")
+# Same rows and fee as DatabaseManager.list_issued_page, so the screen and exports agree.
+LOAN_SELECT = f"""SELECT issue_id, title, student_name, issue_date, expected_return_date,
+                  actual_return_date, status, overdue_days, fee
+                  FROM ({DatabaseManager.ISSUED_SELECT} {{where}})"""
+
+
+@dataclass(frozen=True)
+class ReportSnapshot:
+    """A report as read by one query: its headers and one tuple of values per column.
+
+    Snapshots never change once built, so the same one can be shown, uploaded and
+    exported from different threads.
+    """
+    name: str
+    title: str
+    headers: tuple
+    columns: tuple
+    generated_at: str
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def column(self, header):
+        return self.columns[self.headers.index(header)]
+
+    def rows(self):
+        """The rows as tuples, in report order."""
+        return zip(*self.columns)
+
+
+def _report_query(name, as_of):
+    """(title, headers, sql, params) of the loan report called name."""
+    if name == "all":
+        return ("All Issues", LOAN_HEADERS,
+                LOAN_SELECT.format(where="") + " ORDER BY issue_date DESC, issue_id DESC", [as_of])
+    if name == "overdue":
+        return ("Overdue", LOAN_HEADERS,
+                LOAN_SELECT.format(where="WHERE ib.status='Issued' AND ib.expected_return_date < ?")
+                + " ORDER BY expected_return_date, issue_id", [as_of, as_of])
+    raise Exception(f"Unknown report: {name}")
+
+
+def build_report(dbm, name, as_of_date=None, limit=TOP_BOOKS_LIMIT):
+    """Snapshot of report name ("all", "overdue" or "top"), read in a single query."""
+    if name == "top":
+        title, headers = "Top Books", TOP_HEADERS
+        rows = dbm.get_top_books(limit)
+    else:
+        title, headers, sql, params = _report_query(name, _today(as_of_date))
+        c = dbm.read_cursor()
+        c.execute(sql, params)
+        rows = c.fetchall()
+    columns = tuple(zip(*rows)) if rows else tuple(() for _ in headers)
+    return ReportSnapshot(name, title, headers, columns, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def export_report_csv(snapshot, csv_path):
+    """Write a snapshot to csv_path with a header row; returns the number of rows."""
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(snapshot.headers)
+        writer.writerows(snapshot.rows())
+    return len(snapshot)
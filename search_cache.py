@@ -0,0 +1,164 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from db_manager import fts_query, PAGE_SIZE
+
+MAX_ENTRIES = 32
+# Larger result sets are not cached; they are paged straight from the database instead.
+MAX_CACHED_IDS = 50000
+
+ISSUED_MATCH = """FROM issued_books ib
+                  LEFT JOIN books b ON ib.book_id=b.book_id
+                  LEFT JOIN students s ON ib.student_id=s.student_id
+                  WHERE ib.status='Issued'
+                    AND (ib.book_id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)
+                         OR ib.student_id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?))"""
+
+# kind -> (SQL returning id then searchable columns, SQL counting the matches, groups
+# of column positions that the FTS query must match within, how many times the MATCH
+# parameter is bound)
+SEARCHES = {
+    "books": ("""SELECT b.book_id, b.title, b.author, b.category, b.barcode
+                 FROM books_fts f JOIN books b ON b.book_id=f.rowid
+                 WHERE books_fts MATCH ? ORDER BY f.rank, b.book_id""",
+              "SELECT COUNT(*) FROM books_fts WHERE books_fts MATCH ?", [(1, 2, 3, 4)], 1),
+    "students": ("""SELECT s.student_id, s.name, s.class, s.contact
+                    FROM students_fts f JOIN students s ON s.student_id=f.rowid
+                    WHERE students_fts MATCH ? ORDER BY f.rank, s.student_id""",
+                 "SELECT COUNT(*) FROM students_fts WHERE students_fts MATCH ?", [(1, 2, 3)], 1),
+    "issued": ("SELECT ib.issue_id, b.title, b.author, b.category, b.barcode, s.name, s.class, s.contact "
+               + ISSUED_MATCH + " ORDER BY ib.issue_date DESC, ib.issue_id DESC",
+               "SELECT COUNT(*) " + ISSUED_MATCH, [(1, 2, 3, 4), (5, 6, 7)], 2),
+}
+
+
+def _tokens(text):
+    """Case- and accent-folded words, split the way the FTS unicode61 tokenizer splits them."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.findall(r"[^\W_]+", text)
+
+
+def _matches(terms, groups):
+    """FTS prefix semantics: every term starts some word of at least one group."""
+    return any(all(any(word.startswith(t) for word in words) for t in terms) for words in groups)
+
+
+class _Result:
+    """Matching ids in order, each one's searchable words, and each id's position."""
+    __slots__ = ("ids", "words", "position")
+
+    def __init__(self, ids, words):
+        self.ids = ids
+        self.words = words
+        self.position = {row_id: i for i, row_id in enumerate(ids)}
+
+
+class SearchCache:
+    """LRU cache of search text -> ordered matching ids, keyed by database version.
+
+    A search that extends a cached one (more letters or more words) is answered by
+    filtering the cached superset in memory. The superset's order is kept, so a
+    refined book or student search stays in the shorter search's relevance order.
+    Searches matching more than max_ids rows are remembered as too large.
+    """
+
+    def __init__(self, dbm, max_entries=MAX_ENTRIES, max_ids=MAX_CACHED_IDS):
+        self.dbm = dbm
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self.entries = OrderedDict()  # (kind, version, normalized) -> _Result, or None if too large
+        self.lock = threading.Lock()
+        self.hits = self.refinements = self.misses = 0
+
+    def _lookup(self, kind, version, normalized):
+        with self.lock:
+            key = (kind, version, normalized)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key], True
+            best = None
+            for (k_kind, k_version, k_text), cached in self.entries.items():
+                if (cached is not None and (k_kind, k_version) == (kind, version)
+                        and normalized.startswith(k_text)):
+                    if best is None or len(k_text) > len(best):
+                        best = k_text
+            if best is not None:
+                self.entries.move_to_end((kind, version, best))
+                return self.entries[(kind, version, best)], False
+            return None, False
+
+    def _store(self, kind, version, normalized, matches):
+        with self.lock:
+            self.entries[(kind, version, normalized)] = matches
+            self.entries.move_to_end((kind, version, normalized))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def matches(self, kind, search, version):
+        """The _Result for search, from the cache when possible; None if too large."""
+        terms = _tokens(search)
+        normalized = " ".join(terms)
+        cached, exact = self._lookup(kind, version, normalized)
+        if exact:
+            return cached
+        if cached is not None:
+            self.refinements += 1
+            keep = [i for i, words in enumerate(cached.words) if _matches(terms, words)]
+            matches = _Result([cached.ids[i] for i in keep], [cached.words[i] for i in keep])
+        else:
+            self.misses += 1
+            sql, count_sql, groups, binds = SEARCHES[kind]
+            params = [fts_query(search)] * binds
+            c = self.dbm.read_cursor()
+            c.execute(count_sql, params)
+            if c.fetchone()[0] > self.max_ids:
+                matches = None
+            else:
+                c.execute(sql, params)
+                rows = c.fetchall()
+                matches = _Result([r[0] for r in rows],
+                                  [[_tokens(" ".join(r[i] or "" for i in group)) for group in groups]
+                                   for r in rows])
+        self._store(kind, version, normalized, matches)
+        return matches
+
+    def ids(self, kind, search, version):
+        matches = self.matches(kind, search, version)
+        return None if matches is None else matches.ids
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def pager(self, kind, list_page, load_rows, key):
+        """fetch_page(query, after) for a PagedTableModel.
+
+        query is (search, data_version). Pages come from the cached id list, loaded
+        with load_rows(ids); without search text, or for a result too large to cache,
+        they come from the keyset list_page(search, after).
+        """
+        def fetch_page(query, after):
+            search, version = query or (None, None)
+            result = self.matches(kind, search, version) if fts_query(search) else None
+            if result is None:
+                return list_page(search, after)
+            if after is None:
+                start = 0
+            elif after[key] in result.position:
+                start = result.position[after[key]] + 1
+            else:
+                return []  # the list was rebuilt in a different order; stop paging
+            return load_rows(result.ids[start:start + PAGE_SIZE])
+        return fetch_page
+
+    def counter(self, kind, count_rows):
+        """count(query) for a PagedTableModel; count_rows(search) when the ids are not cached."""
+        def count(query):
+            search, version = query or (None, None)
+            ids = self.ids(kind, search, version) if fts_query(search) else None
+            return count_rows(search) if ids is None else len(ids)
+        return count
@@ -0,0 +1,204 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import gspread
+
+# HTTP statuses that mean "slow down / try again" rather than a real failure.
+RETRY_STATUS = {429, 500, 502, 503}
+
+
+class QuotaError(Exception):
+    """A backend asked us to back off (status 429) or failed on its side (5xx).
+
+    After a 429 the call was not applied and can be retried as-is; after a 5xx it
+    may have been applied, so only idempotent calls should be repeated.
+    """
+
+    def __init__(self, message, status=429):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_a1(ref):
+    """(row, col), both 1-based, of an A1 cell reference such as "AB12"."""
+    m = re.fullmatch(r"([A-Z]+)(\d+)", ref)
+    if not m:
+        raise Exception(f"Bad cell reference: {ref}")
+    col = 0
+    for ch in m.group(1):
+        col = col * 26 + ord(ch) - 64
+    return int(m.group(2)), col
+
+
+class SyncBackend:
+    """Where the Sheets sync writes. open_sheet(title) returns (sheet, created).
+
+    A sheet has an `id` that stays the same for the life of the spreadsheet, and
+    clear(), resize(rows, cols=None), write(blocks) where blocks is a list of
+    {"range": "A1:C2", "values": [[...], ...]}, delete_rows(rows) with 1-based row
+    numbers, and values() returning the whole grid. `requests` counts calls made.
+    """
+    requests = 0
+
+    def open_sheet(self, title):
+        raise NotImplementedError
+
+
+# -------------------------
+# Google Sheets
+# -------------------------
+class GspreadSheet:
+    def __init__(self, backend, ws):
+        self.backend = backend
+        self.ws = ws
+        self.id = ws.spreadsheet.id
+
+    def _call(self, fn, *args, **kwargs):
+        return self.backend._call(fn, *args, **kwargs)
+
+    def clear(self):
+        self._call(self.ws.clear)
+
+    def resize(self, rows, cols=None):
+        self._call(self.ws.resize, rows=rows, cols=cols)
+
+    def write(self, blocks):
+        self._call(self.ws.batch_update, blocks)
+
+    def delete_rows(self, rows):
+        # Highest rows first so earlier deletions do not shift later ones.
+        self._call(self.ws.spreadsheet.batch_update, {"requests": [
+            {"deleteDimension": {"range": {"sheetId": self.ws.id, "dimension": "ROWS",
+                                           "startIndex": r - 1, "endIndex": r}}}
+            for r in sorted(rows, reverse=True)]})
+
+    def values(self):
+        return self._call(self.ws.get_all_values)
+
+
+class GspreadBackend(SyncBackend):
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def _call(self, fn, *args, **kwargs):
+        with self.lock:
+            self.requests += 1
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status in RETRY_STATUS:
+                raise QuotaError(str(e), status)
+            raise
+
+    def open_sheet(self, title):
+        try:
+            return GspreadSheet(self, self._call(self.client.open, title).sheet1), False
+        except gspread.SpreadsheetNotFound:
+            return GspreadSheet(self, self._call(self.client.create, title).sheet1), True
+
+
+# -------------------------
+# Local stand-in
+# -------------------------
+class LocalSheet:
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.id = data["id"]
+        self.grid = data["grid"]
+        self.cols = data["cols"]
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"id": self.id, "cols": self.cols, "grid": self.grid}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self.backend._call()
+        self.grid = [[] for _ in self.grid]
+        self._save()
+
+    def resize(self, rows, cols=None):
+        self.backend._call()
+        if cols is not None:
+            self.cols = cols
+            self.grid = [row[:cols] for row in self.grid]
+        self.grid = self.grid[:rows] + [[] for _ in range(rows - len(self.grid))]
+        self._save()
+
+    def write(self, blocks):
+        self.backend._call()
+        for block in blocks:
+            row, col = _parse_a1(block["range"].split(":")[0])
+            for i, values in enumerate(block["values"], row - 1):
+                if i >= len(self.grid) or col - 1 + len(values) > self.cols:
+                    raise Exception(f"Range {block['range']} exceeds grid limits")
+                cells = self.grid[i] + [""] * (col - 1 + len(values) - len(self.grid[i]))
+                cells[col - 1:col - 1 + len(values)] = values
+                self.grid[i] = cells
+        self._save()
+
+    def delete_rows(self, rows):
+        self.backend._call()
+        for r in sorted(rows, reverse=True):
+            del self.grid[r - 1]
+        self._save()
+
+    def values(self):
+        self.backend._call()
+        width = max((len(row) for row in self.grid), default=0)
+        return [row + [""] * (width - len(row)) for row in self.grid]
+
+
+class LocalBackend(SyncBackend):
+    """Spreadsheets kept as JSON files in a directory, for tests and benchmarks.
+
+    Every call sleeps `latency` seconds, and fails with QuotaError with probability
+    `quota_error_rate`, to imitate a remote API.
+    """
+    NEW_SHEET_ROWS = 1000
+    NEW_SHEET_COLS = 26
+
+    def __init__(self, directory, latency=0.0, quota_error_rate=0.0, seed=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.quota_errors = 0
+
+    def _call(self):
+        with self.lock:
+            self.requests += 1
+            fail = self.random.random() < self.quota_error_rate
+            if fail:
+                self.quota_errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise QuotaError("Quota exceeded (simulated)")
+
+    def _path(self, title):
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", title) + ".json")
+
+    def open_sheet(self, title):
+        self._call()
+        path = self._path(title)
+        created = not os.path.exists(path)
+        if created:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"id": f"local-{title}-{time.time_ns()}", "cols": self.NEW_SHEET_COLS,
+                           "grid": [[] for _ in range(self.NEW_SHEET_ROWS)]}, f)
+        return LocalSheet(self, path), created
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+import drive_sync
+from db_manager import DatabaseManager, SYNC_TABLES
+from sync_backends import LocalBackend
+
+
+def build_database(path, books, seed=0):
+    """Synthetic library with `books` titles, half as many students and as many loans."""
+    dbm = DatabaseManager(path)
+    rng = random.Random(seed)
+    students = max(1, books // 2)
+    start = date(2024, 1, 1)
+    with dbm.transaction() as c:
+        c.executemany("INSERT INTO books (title, author, category, quantity, added_date) VALUES (?,?,?,?,?)",
+                      ((f"Book {i}", f"Author {rng.randrange(books // 10 + 1)}",
+                        rng.choice(["Fiction", "Science", "History", "Maths"]), rng.randint(1, 5),
+                        (start + timedelta(days=rng.randrange(600))).isoformat()) for i in range(books)))
+        c.executemany("INSERT INTO students (name, class, contact) VALUES (?,?,?)",
+                      ((f"Student {i}", f"{rng.randint(1, 12)}-{rng.choice('ABC')}", "")
+                       for i in range(students)))
+        loans = []
+        for _ in range(books):
+            issued = start + timedelta(days=rng.randrange(600))
+            returned = rng.random() < 0.8
+            loans.append((rng.randint(1, books), rng.randint(1, students), issued.isoformat(),
+                          (issued + timedelta(days=7)).isoformat(),
+                          (issued + timedelta(days=rng.randint(1, 14))).isoformat() if returned else None,
+                          "Returned" if returned else "Issued"))
+        c.executemany("""INSERT INTO issued_books (book_id, student_id, issue_date, expected_return_date,
+                         actual_return_date, status) VALUES (?,?,?,?,?,?)""", loans)
+    return dbm
+
+
+def apply_changes(dbm, changes, seed=0):
+    """A day at the desk: `changes` loans, returns, catalog edits, new and removed students."""
+    rng = random.Random(seed)
+    c = dbm.read_cursor()
+    c.execute("SELECT book_id FROM books WHERE quantity > 0")
+    book_ids = [r[0] for r in c.fetchall()]
+    c.execute("SELECT student_id FROM students")
+    student_ids = [r[0] for r in c.fetchall()]
+    c.execute("SELECT issue_id FROM issued_books WHERE status='Issued'")
+    open_ids = [r[0] for r in c.fetchall()]
+    today = date.today().isoformat()
+    due = (date.today() + timedelta(days=7)).isoformat()
+    for _ in range(changes):
+        kind = rng.random()
+        if kind < 0.4 and book_ids:
+            dbm.issue_books(rng.choice(student_ids), [rng.choice(book_ids)], today, due)
+        elif kind < 0.7 and open_ids:
+            dbm.return_books([open_ids.pop(rng.randrange(len(open_ids)))], today)
+        elif kind < 0.85 and book_ids:
+            book = dbm.get_book(rng.choice(book_ids))
+            dbm.update_book(book["book_id"], book["title"] + " (2nd ed.)", book["author"],
+                            book["category"], book["quantity"] + 1)
+        elif kind < 0.95:
+            student_ids.append(dbm.add_student(f"New student {rng.random():.6f}", "1-A", ""))
+        else:
+            dbm.delete_students([student_ids.pop(rng.randrange(len(student_ids)))])
+
+
+def sheet_matches(dbm, backend, table):
+    """True if the table's sheet holds exactly the table's header and rows, in rowid order.
+
+    The sheet is read through a fresh LocalBackend on the same directory, so the check
+    never hits injected quota errors and is left out of the benchmark's counters.
+    """
+    sheet, _ = LocalBackend(backend.directory).open_sheet(drive_sync.sheet_title(table))
+    c = dbm.read_cursor()
+    c.execute(f"SELECT * FROM {table} ORDER BY rowid")
+    expected = [[col[0] for col in c.description]] + [["" if v is None else v for v in r] for r in c.fetchall()]
+    actual = [row[:len(expected[0])] for row in sheet.values()]
+    return actual == expected
+
+
+def timed_sync(dbm, backend):
+    requests = backend.requests
+    start = time.perf_counter()
+    sent = drive_sync.sync_tables(dbm, backend)
+    return sum(sent.values()), time.perf_counter() - start, backend.requests - requests
+
+
+def run(sizes, latency=0.0, quota_error_rate=0.0, changes=200, seed=0):
+    """Full then incremental sync of a synthetic database per size; one result dict each."""
+    results = []
+    for size in sizes:
+        tmp_dir = tempfile.mkdtemp(prefix="library_sync_bench_")
+        dbm = None
+        try:
+            dbm = build_database(os.path.join(tmp_dir, "library.db"), size, seed)
+            backend = LocalBackend(os.path.join(tmp_dir, "sheets"), latency, quota_error_rate, seed)
+            full_rows, full_time, full_requests = timed_sync(dbm, backend)
+            apply_changes(dbm, changes, seed)
+            delta_rows, delta_time, delta_requests = timed_sync(dbm, backend)
+            results.append({
+                "size": size, "full_rows": full_rows, "full_time": full_time, "full_requests": full_requests,
+                "delta_rows": delta_rows, "delta_time": delta_time, "delta_requests": delta_requests,
+                "quota_errors": backend.quota_errors,
+                "consistent": all(sheet_matches(dbm, backend, t) for t in SYNC_TABLES),
+            })
+        finally:
+            if dbm:
+                dbm.close()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full and incremental Sheets sync on synthetic databases.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="number of books (students are half, loans equal)")
+    parser.add_argument("--changes", type=int, default=200, help="changes between the full and incremental sync")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every backend call")
+    parser.add_argument("--quota-errors", type=float, default=0.0, help="chance of a quota error per call")
+    parser.add_argument("--retry-delay", type=float, default=drive_sync.RETRY_BASE_DELAY,
+                        help="first backoff delay in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    drive_sync.RETRY_BASE_DELAY = args.retry_delay
+
+    print(f"{'books':>8} {'full rows':>10} {'full s':>8} {'rows/s':>9} {'reqs':>5}"
+          f" {'delta rows':>10} {'delta s':>8} {'reqs':>5} {'quota':>5}  ok")
+    for r in run(args.sizes, args.latency, args.quota_errors, args.changes, args.seed):
+        rate = r["full_rows"] / r["full_time"] if r["full_time"] else 0
+        print(f"{r['size']:>8} {r['full_rows']:>10} {r['full_time']:>8.2f} {rate:>9.0f} {r['full_requests']:>5}"
+              f" {r['delta_rows']:>10} {r['delta_time']:>8.2f} {r['delta_requests']:>5} {r['quota_errors']:>5}"
+              f"  {'yes' if r['consistent'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
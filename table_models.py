@@ -0,0 +1,280 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+from PyQt6.QtWidgets import QTableView, QAbstractItemView, QHeaderView
+
+from db_manager import PAGE_SIZE
+
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+
+class RowTableModel(QAbstractTableModel):
+    """Read-only table over compact row tuples, with an id -> row index.
+
+    columns is a list of (header, getter) or (header, getter, fmt) where getter is a
+    key into the source rows (e.g. a sqlite3.Row) or a callable taking the row, and
+    fmt turns the stored value into display text. Column key_column holds the row id.
+    """
+
+    def __init__(self, columns, key_column=0, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.row_of = {}
+        self.key_column = key_column
+        self._set_columns(columns)
+
+    def _set_columns(self, columns):
+        self.headers = [col[0] for col in columns]
+        self.getters = [col[1] for col in columns]
+        self.formats = [col[2] if len(col) > 2 else None for col in columns]
+
+    def _pack(self, r):
+        return tuple(g(r) if callable(g) else r[g] for g in self.getters)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = [self._pack(r) for r in rows]
+        self.row_of = {row[self.key_column]: i for i, row in enumerate(self.rows)}
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        packed = [self._pack(r) for r in rows]
+        if not packed:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(packed) - 1)
+        self.rows.extend(packed)
+        for i, row in enumerate(packed, start):
+            self.row_of[row[self.key_column]] = i
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_rows([])
+
+    def row_for_id(self, row_id):
+        return self.row_of.get(row_id)
+
+    def id_at(self, row):
+        return self.rows[row][self.key_column]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return ""
+            fmt = self.formats[index.column()]
+            return fmt(value) if fmt else str(value)
+        if role == SORT_ROLE:
+            return "" if value is None else value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+
+class SnapshotTableModel(QAbstractTableModel):
+    """Read-only table over a reports.ReportSnapshot, read straight from its columns.
+
+    formats maps a header to a function turning a value into display text. The first
+    column holds the row id.
+    """
+
+    def __init__(self, formats=None, parent=None):
+        super().__init__(parent)
+        self.formats = formats or {}
+        self.snapshot = None
+        self.columns = ()
+        self.headers = ()
+        self.column_formats = ()
+        self.row_of = None
+
+    def set_snapshot(self, snapshot):
+        self.beginResetModel()
+        self.snapshot = snapshot
+        self.columns = snapshot.columns if snapshot else ()
+        self.headers = snapshot.headers if snapshot else ()
+        self.column_formats = tuple(self.formats.get(h) for h in self.headers)
+        self.row_of = None
+        self.endResetModel()
+
+    def row_for_id(self, row_id):
+        if self.row_of is None:
+            self.row_of = {value: i for i, value in enumerate(self.columns[0])} if self.columns else {}
+        return self.row_of.get(row_id)
+
+    def id_at(self, row):
+        return self.columns[0][row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or not self.columns else len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.columns[index.column()][index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return ""
+            fmt = self.column_formats[index.column()]
+            return fmt(value) if fmt else str(value)
+        if role == SORT_ROLE:
+            return "" if value is None else value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+
+class PagedTableModel(RowTableModel):
+    """RowTableModel that loads one keyset page at a time as the view scrolls.
+
+    fetch_page(query, after) returns the rows following the source row `after`
+    (None for the first page) and count(query) the total; query is whatever was
+    passed to reset(), e.g. the search text. Qt calls fetchMore when the viewport
+    needs more rows. With a QueryService the pages are fetched on a worker thread.
+    """
+    loaded = pyqtSignal(int, int)  # rows loaded, total rows (0 if unknown)
+    failed = pyqtSignal(str)
+
+    def __init__(self, columns, fetch_page, count=None, key_column=0, service=None, parent=None):
+        super().__init__(columns, key_column, parent)
+        self.fetch_page = fetch_page
+        self.count = count
+        self.service = service
+        self.query = None
+        self.last = None
+        self.total = 0
+        self.exhausted = True
+        self.loading = False
+
+    def reset(self, query=None):
+        self.stop()
+        self.query = query
+        self.last = None
+        self.total = 0
+        self.exhausted = False
+        self.clear()
+        if self.service:
+            fetch_page, count = self.fetch_page, self.count
+            self.loading = True
+            self.service.submit(self, lambda: (count(query) if count else 0, fetch_page(query, None)),
+                                self._first_page_loaded, self._load_failed)
+        else:
+            self.total = self.count(query) if self.count else 0
+            self.fetchMore()
+
+    def stop(self):
+        self.exhausted = True
+        if self.loading:
+            self.service.cancel(self)
+            self.loading = False
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self.service:
+            fetch_page, query, after = self.fetch_page, self.query, self.last
+            self.loading = True
+            self.service.submit(self, lambda: fetch_page(query, after), self._page_loaded, self._load_failed)
+        else:
+            self._page_loaded(self.fetch_page(self.query, self.last))
+
+    def _first_page_loaded(self, result):
+        self.total, rows = result
+        self._page_loaded(rows)
+
+    def _page_loaded(self, rows):
+        self.loading = False
+        if len(rows) < PAGE_SIZE:
+            self.exhausted = True
+        if rows:
+            self.last = rows[-1]
+            self.append_rows(rows)
+        self.loaded.emit(len(self.rows), max(self.total, len(self.rows)))
+
+    def _load_failed(self, error):
+        self.loading = False
+        self.exhausted = True
+        self.failed.emit(error)
+
+    def find(self, row_id):
+        """Row of row_id, loading further pages until it appears or the query is exhausted.
+
+        Pages are fetched synchronously here so a scanned item can be selected at once.
+        """
+        if self.loading:
+            self.service.cancel(self)
+            self.loading = False
+            if self.last is None:
+                self.total = self.count(self.query) if self.count else 0
+        row = self.row_for_id(row_id)
+        while row is None and not self.exhausted:
+            self._page_loaded(self.fetch_page(self.query, self.last))
+            row = self.row_for_id(row_id)
+        return row
+
+
+class TableProxy(QSortFilterProxyModel):
+    """Sorts loaded rows on their raw values and filters on any column's text."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setFilterKeyColumn(-1)
+
+
+def make_table_view(model, multi_select=True):
+    """QTableView showing model through a TableProxy, in the app's read-only table style."""
+    view = QTableView()
+    proxy = TableProxy(view)
+    proxy.setSourceModel(model)
+    view.setModel(proxy)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    if multi_select:
+        view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    # Keep the query's order until the user clicks a header.
+    view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+    view.setSortingEnabled(True)
+    return view
+
+
+def selected_ids(view):
+    """Ids of the selected rows, in view order."""
+    proxy = view.model()
+    source = proxy.sourceModel()
+    rows = sorted(index.row() for index in view.selectionModel().selectedRows())
+    return [source.id_at(proxy.mapToSource(proxy.index(row, 0)).row()) for row in rows]
+
+
+def select_id(view, row_id):
+    """Select and scroll to the row with row_id; False if it is not in the view."""
+    proxy = view.model()
+    source = proxy.sourceModel()
+    row = source.find(row_id) if isinstance(source, PagedTableModel) else source.row_for_id(row_id)
+    if row is None:
+        return False
+    index = proxy.mapFromSource(source.index(row, 0))
+    if not index.isValid():
+        return False
+    view.selectRow(index.row())
+    view.scrollTo(index)
+    return True
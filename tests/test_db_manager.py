@@ -0,0 +1,216 @@
+import sqlite3
+from datetime import date
+
+from db_manager import DatabaseManager, MIGRATIONS
+
+
+def _legacy_database(path):
+    """A library.db as written before schema migrations existed, with some history."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE books (book_id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                            author TEXT, category TEXT, quantity INTEGER DEFAULT 1);
+        CREATE TABLE students (student_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                               class TEXT, contact TEXT);
+        CREATE TABLE issued_books (issue_id INTEGER PRIMARY KEY AUTOINCREMENT, book_id INTEGER,
+                                   student_id INTEGER, issue_date TEXT, expected_return_date TEXT,
+                                   actual_return_date TEXT, status TEXT);
+        CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT);
+        CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO settings VALUES ('overdue_fee', '5');
+        INSERT INTO books (title, author, category, quantity) VALUES
+            ('Dune', 'Frank Herbert', 'Fiction', 2),
+            ('Cosmos', 'Carl Sagan', 'Science', 1);
+        INSERT INTO students (name, class, contact) VALUES ('Aman Sharma', '10A', ''), ('Riya Sen', '9B', '');
+        INSERT INTO issued_books (book_id, student_id, issue_date, expected_return_date,
+                                  actual_return_date, status) VALUES
+            (1, 1, '2025-03-01', '2025-03-08', '2025-03-11', 'Returned'),
+            (2, 2, '2025-03-02', '2025-03-09', '2025-03-05', 'Returned'),
+            (1, 2, '2025-04-02', '2025-04-09', NULL, 'Issued');
+    """)
+    conn.commit()
+    conn.close()
+
+
+def _columns(dbm, table):
+    return [r[1] for r in dbm.read_cursor().execute(f"PRAGMA table_info({table})")]
+
+
+def test_migrations_bring_legacy_database_forward(db_path):
+    _legacy_database(db_path)
+    dbm = DatabaseManager(db_path)
+    try:
+        assert dbm.get_schema_version() == MIGRATIONS[-1][0]
+        assert {"barcode", "added_date"} <= set(_columns(dbm, "books"))
+        assert "card_barcode" in _columns(dbm, "students")
+
+        # Only the late return is backfilled into the fines ledger, at the stored rate.
+        fines = dbm.read_cursor().execute("SELECT issue_id, days_late, rate, amount FROM fines").fetchall()
+        assert [tuple(r) for r in fines] == [(1, 3, 5.0, 15.0)]
+
+        assert dbm.check_stats(repair=False) == {}
+        stats = dbm.get_dashboard_stats()
+        assert (stats["total_books"], stats["total_students"], stats["issued_books"]) == (3, 2, 1)
+
+        issues, returns = dbm.get_circulation_series(2025)
+        assert issues[2:4] == [2, 1] and sum(issues) == 3
+        assert returns[2] == 2 and sum(returns) == 2
+        assert dbm.get_circulation_series(2025, "Science") == ([0, 0, 1] + [0] * 9, [0, 0, 1] + [0] * 9)
+
+        assert dbm.count_books("herb") == 1
+        assert dbm.count_students("riya") == 1
+        tables = {r[0] for r in dbm.read_cursor().execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert "circulation_daily" not in tables
+    finally:
+        dbm.close()
+
+
+def test_migrations_are_applied_once(db_path):
+    DatabaseManager(db_path).close()
+    dbm = DatabaseManager(db_path)
+    try:
+        versions = [r[0] for r in dbm.read_cursor().execute("SELECT version FROM schema_version")]
+        assert versions == [version for version, _, _ in MIGRATIONS]
+        assert dbm.check_stats(repair=False) == {}
+    finally:
+        dbm.close()
+
+
+def test_check_stats_repairs_drift(dbm):
+    dbm.add_book("Dune", "Frank Herbert", "Fiction", 4)
+    dbm.conn.execute("UPDATE stats SET total_books = 99")
+    dbm.conn.commit()
+    assert dbm.check_stats(repair=False) == {"total_books": (99, 4)}
+    assert dbm.check_stats() == {"total_books": (99, 4)}
+    assert dbm.check_stats(repair=False) == {}
+
+
+def _library(dbm, copies=(2, 0)):
+    """A student and one book per entry of copies; returns (student_id, book_ids)."""
+    sid = dbm.add_student("Aman Sharma", "10A", "")
+    return sid, [dbm.add_book(f"Book {i}", "Author", "Fiction", n) for i, n in enumerate(copies)]
+
+
+def test_issue_books_reports_each_position(dbm):
+    sid, (a, b) = _library(dbm)
+    results = dbm.issue_books(sid, [a, a, a, b, 999], "2025-05-01", "2025-05-08")
+    assert all(isinstance(r, int) for r in results[:2])
+    assert results[2:] == ["No copies available to issue.", "No copies available to issue.", "Book not found."]
+    assert dbm.get_book(a)["quantity"] == 0
+    assert dbm.get_dashboard_stats()["issued_books"] == 2
+    assert dbm.get_circulation_series(2025)[0][4] == 2
+
+
+def test_return_books_skips_missing_and_returned_loans(dbm):
+    sid, (a, _) = _library(dbm)
+    first, second = dbm.issue_books(sid, [a, a], "2025-05-01", "2025-05-08")
+    returned, errors = dbm.return_books([first, first, 999], "2025-05-06")
+    assert returned == [first]
+    assert errors == {999: "Issue record not found."}
+    assert dbm.return_books([first, second], "2025-05-07") == ([second], {first: "Book already returned."})
+    assert dbm.get_book(a)["quantity"] == 2
+    assert dbm.check_stats(repair=False) == {}
+    assert dbm.get_circulation_series(2025)[1][4] == 2
+
+
+def test_circulate_applies_returns_before_issues(dbm):
+    sid, (a, _) = _library(dbm, copies=(1, 0))
+    other = dbm.add_student("Riya Sen", "9B", "")
+    loan = dbm.issue_book(a, sid, "2025-05-01", "2025-05-08")
+    results, returned, errors = dbm.circulate([(other, a), (sid, a)], [loan], "2025-05-02", "2025-05-09")
+    assert returned == [loan] and errors == {}
+    assert isinstance(results[0], int)
+    assert results[1] == "No copies available to issue."
+    assert dbm.get_issue(results[0])["student_id"] == other
+
+
+def _all_pages(list_page, limit):
+    rows, after = [], None
+    while True:
+        page = list_page(after, limit)
+        assert len(page) <= limit
+        rows += page
+        if len(page) < limit:
+            return rows
+        after = page[-1]
+
+
+def test_book_pages_visit_every_row_once(dbm):
+    titles = {dbm.add_book(f"Title {i % 4}", "Author", "Fiction", 1): f"Title {i % 4}" for i in range(23)}
+    rows = _all_pages(lambda after, limit: dbm.list_books_page(None, after, limit), 5)
+    assert [r["book_id"] for r in rows] == sorted(titles, key=lambda i: (titles[i], i))
+
+    found = _all_pages(lambda after, limit: dbm.list_books_page("title 2", after, limit), 2)
+    assert sorted(r["book_id"] for r in found) == [i for i, t in titles.items() if t == "Title 2"]
+    assert dbm.count_books("title 2") == len(found)
+
+
+def test_student_pages_visit_every_row_once(dbm):
+    ids = [dbm.add_student("Same Name", "10A", "") for _ in range(7)]
+    rows = _all_pages(lambda after, limit: dbm.list_students_page(None, after, limit), 3)
+    assert [r["student_id"] for r in rows] == ids
+
+
+def test_issued_pages_are_newest_first(dbm):
+    sid, (a, _) = _library(dbm, copies=(12, 0))
+    dates = {dbm.issue_book(a, sid, f"2025-01-0{1 + i % 3}", "2025-02-01"): f"2025-01-0{1 + i % 3}"
+             for i in range(12)}
+    loans = list(dates)
+    dbm.return_books(loans[:4], "2025-01-20")
+    rows = _all_pages(lambda after, limit: dbm.list_issued_page(False, None, after, limit), 5)
+    assert [r["issue_id"] for r in rows] == sorted(loans, key=lambda i: (dates[i], i), reverse=True)
+    open_rows = _all_pages(lambda after, limit: dbm.list_issued_page(True, "aman", after, limit), 3)
+    assert sorted(r["issue_id"] for r in open_rows) == loans[4:]
+    assert dbm.count_issued(True, "aman") == 8
+
+
+def test_search_index_follows_book_edits(dbm):
+    book = dbm.add_book("Dune", "Frank Herbert", "Fiction", 1)
+    assert [r["book_id"] for r in dbm.list_books_page("du herb")] == [book]
+    dbm.update_book(book, "Children of Dune", "Frank Herbert", "Classics", 1)
+    dbm.update_book_barcode(book, "978044")
+    assert dbm.count_books("children") == 1
+    assert dbm.count_books("fiction") == 0
+    assert dbm.count_books("978044") == 1
+    dbm.delete_book(book)
+    assert dbm.count_books("dune") == 0
+
+
+def test_search_index_follows_student_edits(dbm):
+    sid = dbm.add_student("Aman Sharma", "10A", "98100", "CARD-1")
+    dbm.update_student(sid, "Aman Verma", "10A", "98100")
+    assert dbm.count_students("sharma") == 0
+    assert [r["student_id"] for r in dbm.list_students_page("verma")] == [sid]
+    assert dbm.get_student(sid)["card_barcode"] is None
+    dbm.update_student(sid, "Aman Verma", "10A", "98100", "CARD-2")
+    assert [r["student_id"] for r in dbm.pick_students("CARD-2")] == [sid]
+    dbm.delete_student(sid)
+    assert dbm.count_students("aman") == 0
+
+
+def test_rebuild_search_index_matches_triggers(dbm):
+    for i in range(5):
+        dbm.add_book(f"Atlas {i}", "Author", "Maps", 1)
+    dbm.rebuild_search_index()
+    assert dbm.count_books("atlas") == 5
+    assert dbm.count_books("at") == 5
+
+
+def test_fines_are_assessed_once_at_the_rate_in_effect(dbm):
+    sid, (a, _) = _library(dbm, copies=(4, 0))
+    dbm.set_overdue_fee(2)
+    late, on_time, later, still_out = dbm.issue_books(sid, [a] * 4, "2025-01-01", "2025-01-05")
+    dbm.return_books([late], "2025-01-09")
+    dbm.return_books([on_time], "2025-01-05")
+    dbm.set_overdue_fee(10)
+    dbm.return_books([later, late], "2025-01-07")
+
+    fines = dbm.read_cursor().execute("SELECT issue_id, days_late, rate, amount FROM fines ORDER BY issue_id")
+    assert [tuple(r) for r in fines] == [(late, 4, 2.0, 8.0), (later, 2, 10.0, 20.0)]
+    assert dbm.get_fee_income(date(2025, 1, 31)) == (28.0, 28.0)
+    assert dbm.get_fee_income(date(2025, 2, 1)) == (0, 28.0)
+
+    # Returned loans show their ledger entry; open ones accrue at today's rate.
+    rows = {r["issue_id"]: r for r in dbm.get_issues_by_ids([late, on_time, still_out])}
+    assert (rows[late]["fee"], rows[on_time]["fee"]) == (8.0, 0)
+    assert rows[still_out]["fee"] == rows[still_out]["overdue_days"] * 10.0 > 0
@@ -0,0 +1,134 @@
+import pytest
+
+import drive_sync
+from db_manager import SYNC_TABLES
+from sync_backends import LocalBackend, LocalSheet, QuotaError
+from sync_benchmark import sheet_matches
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalBackend(str(tmp_path / "sheets"))
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(drive_sync.time, "sleep", lambda seconds: None)
+
+
+def _books(dbm, n):
+    return [dbm.add_book(f"Book {i}", "Author", "Fiction", 1) for i in range(n)]
+
+
+def _sync_state(dbm, table):
+    c = dbm.read_cursor()
+    c.execute("SELECT * FROM sync_state WHERE tbl=?", (table,))
+    state = c.fetchone()
+    c.execute("SELECT row_id FROM sync_rows WHERE tbl=? ORDER BY sheet_row", (table,))
+    return state, [r[0] for r in c.fetchall()]
+
+
+def test_later_syncs_send_only_changed_rows(dbm, backend):
+    ids = _books(dbm, 10)
+    assert drive_sync.sync_table(dbm, backend, "books") == 10
+    assert sheet_matches(dbm, backend, "books")
+    assert drive_sync.sync_table(dbm, backend, "books") == 0
+
+    dbm.update_book(ids[5], "Renamed", "Author", "Fiction", 2)
+    dbm.delete_books([ids[1], ids[7]])
+    added = dbm.add_book("New", "Author", "Fiction", 1)
+    before = backend.requests
+    # Two deleted rows, then the renamed row and the appended one.
+    assert drive_sync.sync_table(dbm, backend, "books") == 4
+    assert backend.requests - before <= 5
+    assert sheet_matches(dbm, backend, "books")
+
+    state, row_ids = _sync_state(dbm, "books")
+    assert row_ids == [i for i in ids if i not in (ids[1], ids[7])] + [added]
+    assert state["row_count"] == 9
+    assert dbm.read_cursor().execute("SELECT COUNT(*) FROM changes").fetchone()[0] == 0
+
+
+def test_delta_grows_the_sheet_for_appended_rows(dbm, backend):
+    _books(dbm, 4)
+    drive_sync.sync_table(dbm, backend, "books")
+    sheet, _ = backend.open_sheet(drive_sync.sheet_title("books"))
+    assert len(sheet.values()) == 5
+    dbm.delete_book(1)
+    _books(dbm, 2)
+    drive_sync.sync_table(dbm, backend, "books")
+    sheet, _ = backend.open_sheet(drive_sync.sheet_title("books"))
+    assert len(sheet.values()) == 6
+    assert sheet_matches(dbm, backend, "books")
+
+
+def test_large_deltas_fall_back_to_full_sync(dbm, backend, monkeypatch):
+    ids = _books(dbm, 6)
+    drive_sync.sync_table(dbm, backend, "books")
+    dbm.delete_books(ids[:4])
+    monkeypatch.setattr(LocalSheet, "delete_rows", lambda self, rows: pytest.fail("delta sync used"))
+    assert drive_sync.sync_table(dbm, backend, "books") == 2
+    assert sheet_matches(dbm, backend, "books")
+
+
+def test_all_tables_sync_through_quota_errors(dbm, tmp_path):
+    sid = dbm.add_student("Aman Sharma", "10A", "")
+    dbm.issue_books(sid, _books(dbm, 30), "2025-05-01", "2025-05-08")
+    backend = LocalBackend(str(tmp_path / "flaky"), quota_error_rate=0.3, seed=1)
+    drive_sync.sync_tables(dbm, backend)
+    dbm.return_books([1, 2], "2025-05-03")
+    drive_sync.sync_tables(dbm, backend)
+    assert backend.quota_errors > 0
+    assert all(sheet_matches(dbm, backend, table) for table in SYNC_TABLES)
+
+
+def test_full_upload_is_sent_in_chunks(dbm, backend, monkeypatch):
+    monkeypatch.setattr(drive_sync, "UPLOAD_CHUNK", 10)
+    monkeypatch.setattr(drive_sync, "BLOCKS_PER_REQUEST", 3)
+    _books(dbm, 45)
+    writes, progress = [], []
+    write = LocalSheet.write
+    monkeypatch.setattr(LocalSheet, "write", lambda self, blocks: writes.append(len(blocks)) or write(self, blocks))
+    assert drive_sync.sync_table(dbm, backend, "books", lambda done, total: progress.append((done, total))) == 45
+    # Header plus five blocks of at most ten rows, three blocks per request.
+    assert writes == [3, 3]
+    assert progress == [(20, 45), (45, 45)]
+    assert sheet_matches(dbm, backend, "books")
+
+
+def test_server_error_on_delete_is_not_retried(dbm, backend, monkeypatch):
+    ids = _books(dbm, 10)
+    drive_sync.sync_table(dbm, backend, "books")
+    dbm.delete_book(ids[3])
+    calls = []
+
+    def delete_then_fail(self, rows):
+        calls.append(rows)
+        delete_rows(self, rows)
+        raise QuotaError("Backend error", status=503)
+
+    delete_rows = LocalSheet.delete_rows
+    monkeypatch.setattr(LocalSheet, "delete_rows", delete_then_fail)
+    # The delete may have gone through, so the sheet is rebuilt rather than deleted from twice.
+    assert drive_sync.sync_table(dbm, backend, "books") == 9
+    assert calls == [[5]]
+    assert sheet_matches(dbm, backend, "books")
+
+
+def test_rate_limited_delete_is_retried(dbm, backend, monkeypatch):
+    ids = _books(dbm, 10)
+    drive_sync.sync_table(dbm, backend, "books")
+    dbm.delete_book(ids[3])
+    calls = []
+
+    def refuse_once(self, rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise QuotaError("Quota exceeded")
+        delete_rows(self, rows)
+
+    delete_rows = LocalSheet.delete_rows
+    monkeypatch.setattr(LocalSheet, "delete_rows", refuse_once)
+    assert drive_sync.sync_table(dbm, backend, "books") == 1
+    assert calls == [[5], [5]]
+    assert sheet_matches(dbm, backend, "books")
@@ -0,0 +1,77 @@
+import csv
+
+from importer import import_books, import_students
+
+
+def _csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_book_import_upserts_by_barcode(dbm, tmp_path):
+    first = _csv(tmp_path / "books.csv", ["Title", "Author", "Category", "Quantity", "Barcode"], [
+        ["Dune", "Frank Herbert", "Fiction", "3", "B1"],
+        ["Cosmos", "Carl Sagan", "Science", "", ""],
+        ["", "Nobody", "", "1", "B2"],
+        ["Emma", "Jane Austen", "Fiction", "two", "B3"],
+    ])
+    result = import_books(dbm, first)
+    assert (result["inserted"], result["updated"]) == (2, 0)
+    assert result["rejected"] == [(4, "Title is required."), (5, "Invalid quantity: 'two'")]
+
+    dune = dbm.get_book_by_barcode("B1")
+    sid = dbm.add_student("Aman Sharma", "10A", "")
+    dbm.issue_books(sid, [dune["book_id"]] * 2, "2025-05-01", "2025-05-08")
+
+    # quantity in the CSV is total copies; the two on loan stay off the shelf.
+    second = _csv(tmp_path / "books2.csv", ["title", "author", "category", "quantity", "barcode"], [
+        ["Dune (2nd ed.)", "Frank Herbert", "Fiction", "5", "B1"],
+        ["Emma", "Jane Austen", "Fiction", "1", "B3"],
+    ])
+    result = import_books(dbm, second)
+    assert (result["inserted"], result["updated"], result["rejected"]) == (1, 1, [])
+    dune = dbm.get_book(dune["book_id"])
+    assert (dune["title"], dune["quantity"]) == ("Dune (2nd ed.)", 3)
+    assert dbm.count_books("2nd") == 1
+    assert dbm.check_stats(repair=False) == {}
+
+
+def test_book_import_streams_in_batches(dbm, tmp_path):
+    rows = [[f"Book {i}", "Author", "Fiction", "1", f"B{i % 40}"] for i in range(100)]
+    path = _csv(tmp_path / "books.csv", ["title", "author", "category", "quantity", "barcode"], rows)
+    progress = []
+    result = import_books(dbm, path, batch_size=30, progress=lambda done, rejected: progress.append(done))
+    assert progress == [30, 60, 90, 100]
+    assert result["inserted"] == 40
+    assert dbm.count_books() == 40
+    # The last row for each barcode wins.
+    assert dbm.get_book_by_barcode("B0")["title"] == "Book 80"
+
+
+def test_import_stops_when_cancelled(dbm, tmp_path):
+    path = _csv(tmp_path / "books.csv", ["title"], [[f"Book {i}"] for i in range(10)])
+    batches = []
+    result = import_books(dbm, path, batch_size=4, progress=lambda done, rejected: batches.append(done),
+                          cancelled=lambda: len(batches) == 1)
+    assert result["inserted"] == 4
+    assert dbm.count_books() == 4
+
+
+def test_student_import_upserts_by_name_and_class(dbm, tmp_path):
+    existing = dbm.add_student("Aman Sharma", "10A", "old")
+    path = _csv(tmp_path / "students.csv", ["name", "class", "contact"], [
+        ["Aman Sharma", "10A", "98100"],
+        ["Aman Sharma", "9B", ""],
+        ["Riya Sen", "9B", "1"],
+        ["Riya Sen", "9B", "2"],
+        ["", "9B", ""],
+    ])
+    result = import_students(dbm, path)
+    assert (result["inserted"], result["updated"]) == (2, 1)
+    assert result["rejected"] == [(6, "Name is required.")]
+    assert dbm.get_student(existing)["contact"] == "98100"
+    assert [r["contact"] for r in dbm.list_students_page("riya")] == ["2"]
+    assert dbm.count_students() == 3
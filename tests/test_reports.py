@@ -0,0 +1,43 @@
+import csv
+from datetime import date
+
+from reports import LOAN_HEADERS, build_report, export_report_csv
+
+
+def _loans(dbm):
+    sid = dbm.add_student("Aman Sharma", "10A", "")
+    books = [dbm.add_book(f"Book {i}", "Author", "Fiction", 2) for i in range(3)]
+    dbm.set_overdue_fee(3)
+    loans = dbm.issue_books(sid, [books[0], books[0], books[1]], "2025-01-01", "2025-01-05")
+    dbm.return_books([loans[0]], "2025-01-07")
+    return books, loans
+
+
+def test_all_issues_report_matches_the_paged_view(dbm):
+    _loans(dbm)
+    report = build_report(dbm, "all")
+    assert report.headers == LOAN_HEADERS
+    rows = dbm.list_issued_page(False)
+    assert list(report.column("Issue ID")) == [r["issue_id"] for r in rows]
+    assert list(report.column("Fee")) == [r["fee"] for r in rows]
+    assert list(report.column("Overdue Days")) == [r["overdue_days"] for r in rows]
+
+
+def test_overdue_report_is_as_of_a_date(dbm):
+    _, loans = _loans(dbm)
+    report = build_report(dbm, "overdue", as_of_date=date(2025, 1, 9))
+    assert list(report.column("Issue ID")) == loans[1:]
+    assert list(report.column("Fee")) == [12.0, 12.0]
+    assert len(build_report(dbm, "overdue", as_of_date=date(2025, 1, 5))) == 0
+
+
+def test_top_books_report_and_csv_export(dbm, tmp_path):
+    books, _ = _loans(dbm)
+    report = build_report(dbm, "top", limit=2)
+    assert list(report.column("Book ID")) == books[:2]
+    assert list(report.column("Times Issued")) == [2, 1]
+
+    path = tmp_path / "top.csv"
+    assert export_report_csv(report, str(path)) == 2
+    with open(path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [list(report.headers)] + [[str(v) for v in r] for r in report.rows()]